@@ -0,0 +1,241 @@
+import math
+import numpy as np
+
+
+# Add a value to an exact sum, represented by its partials (non-overlapping floats whose sum is exactly the sum of the
+# added values, as in math.fsum): the partials are few, and their rounded sum does not depend on the order of the
+# additions
+def add_partials(partials, value):
+    index = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low != 0.0:
+            partials[index] = low
+            index = index + 1
+        value = high
+    partials[index:] = [value]
+
+
+# Get the rounded value of an avg or sum aggregation, given the sum of the not null values and their number
+def rounded(function, total, count):
+    total = np.float64(total)
+    if function == 'sum':
+        return round(total, 2)
+    elif count > 0:
+        return round(total / count, 2)
+    return np.nan
+
+
+# Resolve a single cluster (given as positions in the record store, sorted as in the dataset) into an entity
+def resolve(store, positions, aggregations):
+    entity = dict()
+    for attribute, function in aggregations.items():
+        if function in ['min', 'max'] and attribute in store.categories:
+            # The codes of the distinct values are sorted, so the extreme code identifies the extreme value
+            codes = store.columns[attribute][positions]
+            if function == 'min':
+                entity[attribute] = store.categories[attribute][codes.min()]
+            else:
+                entity[attribute] = store.categories[attribute][codes.max()]
+        elif function == 'min':
+            entity[attribute] = np.fmin.reduce(store.columns[attribute][positions])
+        elif function == 'max':
+            entity[attribute] = np.fmax.reduce(store.columns[attribute][positions])
+        elif function in ['avg', 'sum']:
+            # Null values are ignored (they do not contribute to the sum, nor to the count)
+            # The values are summed exactly, so that the rounded value does not depend on the order of the additions
+            values = store.columns[attribute][positions].astype(float)
+            values = values[~np.isnan(values)]
+            entity[attribute] = rounded(function, math.fsum(values.tolist()), len(values))
+        elif function == 'vote':
+            # The most frequent value is selected, breaking the ties in favour of the lowest one (null values last)
+            values, counts = np.unique(store.columns[attribute][positions], return_counts=True)
+            if attribute in store.categories:
+                entity[attribute] = store.categories[attribute][values[counts.argmax()]]
+            else:
+                entity[attribute] = values[counts.argmax()]
+        elif function == 'random':
+            entity[attribute] = np.random.choice(store.values(attribute, positions))
+        elif function == 'concat':
+            entity[attribute] = ' ; '.join(store.values(attribute, positions))
+
+    return entity
+
+
+# Resolve many clusters (collections of integer identifiers) at once, using segment operations on the records sorted by
+# cluster label
+# The result is a dictionary containing for each attribute the array of the values of the obtained entities
+def resolve_clusters(store, clusters, aggregations):
+    # Assign to each record the label of its cluster, keeping the records of each cluster sorted as in the dataset
+    positions = list()
+    labels = list()
+    for label, cluster in enumerate(clusters):
+        cluster_positions = np.sort(np.fromiter(cluster, dtype=np.int64))
+        positions.append(cluster_positions)
+        labels.append(np.full(len(cluster_positions), label, dtype=np.int64))
+    if len(positions) == 0:
+        return dict((attribute, np.empty(0, dtype=object)) for attribute in aggregations.keys())
+    positions = np.concatenate(positions)
+    labels = np.concatenate(labels)
+
+    # Each segment of consecutive records with the same label represents a cluster
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    sizes = np.diff(np.r_[starts, len(labels)])
+
+    entities = dict()
+    for attribute, function in aggregations.items():
+        if function in ['min', 'max'] and attribute in store.categories:
+            codes = store.columns[attribute][positions]
+            if function == 'min':
+                entities[attribute] = store.categories[attribute][np.minimum.reduceat(codes, starts)]
+            else:
+                entities[attribute] = store.categories[attribute][np.maximum.reduceat(codes, starts)]
+        elif function == 'min':
+            entities[attribute] = np.fmin.reduceat(store.columns[attribute][positions], starts)
+        elif function == 'max':
+            entities[attribute] = np.fmax.reduceat(store.columns[attribute][positions], starts)
+        elif function in ['avg', 'sum']:
+            values = store.columns[attribute][positions].astype(float)
+            not_null = ~np.isnan(values)
+            values = np.where(not_null, values, 0.0)
+            sums = np.add.reduceat(values, starts)
+            counts = np.add.reduceat(not_null.astype(np.int64), starts)
+            if function == 'sum':
+                divisors = np.ones(len(sums))
+            else:
+                divisors = counts
+            # The segment reduction sums the values sequentially, while resolve sums them exactly: the rounded values
+            # can differ only for the clusters (of more than two records) whose sum is close to a rounding boundary,
+            # given the error bound of the sequential sum, so only their values are summed again exactly
+            errors = 2 * sizes * np.finfo(float).eps * np.add.reduceat(np.abs(values), starts)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                entities[attribute] = np.round(sums / divisors, 2)
+                uncertain = (sizes > 2) & (divisors > 0) & \
+                    (np.round((sums - errors) / divisors, 2) != np.round((sums + errors) / divisors, 2))
+            for cluster in np.flatnonzero(uncertain).tolist():
+                start = starts[cluster]
+                total = math.fsum(values[start:start + sizes[cluster]].tolist())
+                entities[attribute][cluster] = rounded(function, total, counts[cluster])
+        elif function == 'vote':
+            # Count the occurrences of each (cluster, value) pair, then select for each cluster the most frequent value
+            codes, categories = store.codes(attribute)
+            codes = codes[positions]
+            pairs, counts = np.unique(labels * len(categories) + codes, return_counts=True)
+            pair_labels = pairs // len(categories)
+            order = np.lexsort((pairs % len(categories), -counts, pair_labels))
+            first = order[np.r_[True, pair_labels[order][1:] != pair_labels[order][:-1]]]
+            entities[attribute] = categories[pairs[first] % len(categories)]
+        elif function == 'random':
+            values = store.values(attribute, positions)
+            entities[attribute] = np.array([np.random.choice(values[start:start + size])
+                                            for start, size in zip(starts, sizes)], dtype=object)
+        elif function == 'concat':
+            values = store.values(attribute, positions)
+            entities[attribute] = np.array([' ; '.join(values[start:start + size])
+                                            for start, size in zip(starts, sizes)], dtype=object)
+
+    return entities
+
+
+# Create the mergeable aggregate state of a single record (given as position in the record store)
+# The states of two groups of records can be merged to get the state of their union, so that the aggregated values of a
+# cluster can be computed incrementally, without reading again the values of its records
+def record_state(store, position, aggregations):
+    state = dict()
+    for attribute, function in aggregations.items():
+        if function in ['min', 'max']:
+            # Running extreme value (or code, for non-numeric attributes)
+            state[attribute] = store.columns[attribute][position]
+        elif function in ['avg', 'sum']:
+            # Exact running sum (partials, see add_partials) and count of the not null values
+            value = float(store.columns[attribute][position])
+            if np.isnan(value):
+                state[attribute] = ([], 0)
+            else:
+                state[attribute] = ([value], 1)
+        elif function == 'vote':
+            # Number of occurrences of each value (referred by its code)
+            state[attribute] = {store.codes(attribute)[0][position]: 1}
+        else:
+            # Functions depending on all the values (random, concat) keep the positions of the records
+            state[attribute] = [position]
+    return state
+
+
+# Create the mergeable aggregate state of a group of records (given as positions in the record store) at once, as if the
+# states of its records were merged
+def group_state(store, positions, aggregations):
+    positions = np.asarray(positions, dtype=np.int64)
+    state = dict()
+    for attribute, function in aggregations.items():
+        if function == 'min':
+            state[attribute] = np.fmin.reduce(store.columns[attribute][positions])
+        elif function == 'max':
+            state[attribute] = np.fmax.reduce(store.columns[attribute][positions])
+        elif function in ['avg', 'sum']:
+            values = store.columns[attribute][positions].astype(float)
+            values = values[~np.isnan(values)]
+            partials = list()
+            for value in values.tolist():
+                add_partials(partials, value)
+            state[attribute] = (partials, len(values))
+        elif function == 'vote':
+            codes, counts = np.unique(store.codes(attribute)[0][positions], return_counts=True)
+            state[attribute] = dict(zip(codes.tolist(), counts.tolist()))
+        else:
+            state[attribute] = positions.tolist()
+    return state
+
+
+# Merge the aggregate states of two disjoint groups of records
+def merge_states(aggregations, state, other):
+    merged = dict()
+    for attribute, function in aggregations.items():
+        if function == 'min':
+            merged[attribute] = np.fmin(state[attribute], other[attribute])
+        elif function == 'max':
+            merged[attribute] = np.fmax(state[attribute], other[attribute])
+        elif function in ['avg', 'sum']:
+            # The partials of the other sum are added to (a copy of) the ones of the first sum
+            partials = list(state[attribute][0])
+            for partial in other[attribute][0]:
+                add_partials(partials, partial)
+            merged[attribute] = (partials, state[attribute][1] + other[attribute][1])
+        elif function == 'vote':
+            counts = dict(state[attribute])
+            for code, count in other[attribute].items():
+                counts[code] = counts.get(code, 0) + count
+            merged[attribute] = counts
+        else:
+            merged[attribute] = state[attribute] + other[attribute]
+    return merged
+
+
+# Get the aggregated value of an attribute from its aggregate state
+def state_value(store, attribute, function, state):
+    if function in ['min', 'max']:
+        if attribute in store.categories:
+            return store.categories[attribute][state]
+        return state
+    elif function in ['avg', 'sum']:
+        # The exact sum is rounded only once, as in resolve
+        return rounded(function, math.fsum(state[0]), state[1])
+    elif function == 'vote':
+        # As in batch resolution, ties are broken in favour of the lowest value (null values last)
+        code = min(state.keys(), key=lambda x: (-state[x], x))
+        return store.codes(attribute)[1][code]
+    elif function == 'random':
+        return np.random.choice(store.values(attribute, np.sort(state)))
+    elif function == 'concat':
+        return ' ; '.join(store.values(attribute, np.sort(state)))
+
+
+# Materialize the entity described by the given aggregate states
+def materialize(store, state, aggregations):
+    entity = dict()
+    for attribute, function in aggregations.items():
+        entity[attribute] = state_value(store, attribute, function, state[attribute])
+    return entity
@@ -0,0 +1,49 @@
+import collections
+
+
+class Automaton(object):
+    # Aho-Corasick automaton of a set of literal patterns: a text is scanned only once to find all the patterns it
+    # contains, instead of searching each pattern separately
+    # Each state is a node of the trie of the patterns, with its transitions, its failure link (state of the longest
+    # proper suffix also appearing in the trie) and the indices of the patterns ending in it
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.transitions = [dict()]
+        self.failures = [0]
+        self.outputs = [list()]
+
+        # Build the trie of the patterns
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for character in pattern:
+                if character not in self.transitions[state]:
+                    self.transitions.append(dict())
+                    self.failures.append(0)
+                    self.outputs.append(list())
+                    self.transitions[state][character] = len(self.transitions) - 1
+                state = self.transitions[state][character]
+            self.outputs[state].append(index)
+
+        # Compute the failure links in breadth-first order, inheriting the outputs of the failure states
+        queue = collections.deque(self.transitions[0].values())
+        while len(queue) > 0:
+            state = queue.popleft()
+            for character, child in self.transitions[state].items():
+                failure = self.failures[state]
+                while failure > 0 and character not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                if character in self.transitions[failure] and self.transitions[failure][character] != child:
+                    self.failures[child] = self.transitions[failure][character]
+                self.outputs[child] = self.outputs[child] + self.outputs[self.failures[child]]
+                queue.append(child)
+
+    # Get the indices of the patterns appearing in the text
+    def search(self, text):
+        found = set()
+        state = 0
+        for character in text:
+            while state > 0 and character not in self.transitions[state]:
+                state = self.failures[state]
+            state = self.transitions[state].get(character, 0)
+            found.update(self.outputs[state])
+        return found
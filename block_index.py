@@ -0,0 +1,96 @@
+import json
+import numpy as np
+import os
+import record_store
+
+
+class Rows(object):
+    # Sequence of rows of different length in compressed sparse row format: the values of all the rows are concatenated
+    # in a single array, in which each row occupies the range delimited by its offsets
+    def __init__(self, offsets, values):
+        self.offsets = offsets
+        self.values = values
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def __iter__(self):
+        for row in range(0, len(self)):
+            yield self[row]
+
+
+# Get the rows of a sequence (e.g., the records of a list of blocks) concatenated in a single array, together with the
+# offsets delimiting them
+def concatenate(rows):
+    if isinstance(rows, Rows):
+        return np.asarray(rows.values), np.asarray(rows.offsets)
+    offsets = np.cumsum([0] + [len(row) for row in rows], dtype=np.int64)
+    values = np.concatenate([np.empty(0, dtype=np.int32)] + [np.asarray(row, dtype=np.int32) for row in rows])
+    return values, offsets
+
+
+def file(path, name):
+    return os.path.join(path, name + '.npy')
+
+
+# Get the path of the description of the index (written last, so the index exists only if its description exists)
+def description(path):
+    return os.path.join(path, 'index.json')
+
+
+def exists(path):
+    return os.path.isfile(description(path))
+
+
+# Write the block index of a dataset, given in terms of integer identifiers of the records (positions in the dataset):
+# the blocks (sequences of records), the blocking keys of each record (indices in the array of the costs) and the cost
+# of each blocking key (number of comparisons required by its block)
+# The fingerprint identifies the dataset the integer identifiers refer to (see record_store.fingerprint), while the
+# sources (if any) are the states of the files the index was built from (see input_bundle.source_states)
+def write(path, fingerprint, blocks, record_blocks, block_costs, sources=None):
+    os.makedirs(path, exist_ok=True)
+    if exists(path):
+        os.remove(description(path))
+
+    np.save(file(path, 'block_offsets'), np.cumsum([0] + [len(block) for block in blocks], dtype=np.int64))
+    np.save(file(path, 'block_records'), np.array([record for block in blocks for record in block], dtype=np.int32))
+    np.save(file(path, 'record_offsets'), np.cumsum([0] + [len(keys) for keys in record_blocks], dtype=np.int64))
+    np.save(file(path, 'record_keys'), np.array([key for keys in record_blocks for key in keys], dtype=np.int32))
+    np.save(file(path, 'block_costs'), np.asarray(block_costs, dtype=np.int64))
+
+    # The description of the index is written last: an interrupted write leaves no index
+    with open(description(path), 'w') as output_file:
+        json.dump({'fingerprint': fingerprint, 'records': len(record_blocks), 'blocks': len(blocks),
+                   'sources': sources}, output_file)
+
+
+# Write the block index of a dataset, given in terms of record identifiers (as produced by the blocking functions of the
+# dataset generation scripts): the blocks (lists of identifiers), the blocking keys of each record (dictionary) and the
+# cost of each blocking key (dictionary)
+def write_blocking(path, record_ids, blocks, record_blocks, block_costs):
+    positions = dict((record_id, position) for position, record_id in enumerate(record_ids))
+    keys = dict((key, index) for index, key in enumerate(block_costs.keys()))
+    write(path, record_store.fingerprint(record_ids),
+          [[positions[record_id] for record_id in block] for block in blocks],
+          [[keys[key] for key in record_blocks.get(record_id, list())] for record_id in record_ids],
+          list(block_costs.values()))
+
+
+class BlockIndex(object):
+    # Blocks of a dataset, memory-mapped from the files of the block index: a single block (or the blocking keys of a
+    # single record) can be accessed without reading the rest of the index
+    def __init__(self, path):
+        with open(description(path), 'r') as input_file:
+            self.fingerprint = json.load(input_file)['fingerprint']
+
+        # Records of each block
+        self.blocks = Rows(np.load(file(path, 'block_offsets'), mmap_mode='r'),
+                           np.load(file(path, 'block_records'), mmap_mode='r'))
+        # Blocking keys of each record
+        self.record_blocks = Rows(np.load(file(path, 'record_offsets'), mmap_mode='r'),
+                                  np.load(file(path, 'record_keys'), mmap_mode='r'))
+        # Cost of each blocking key
+        self.block_costs = np.load(file(path, 'block_costs'), mmap_mode='r')
@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class BlockTable(object):
+    # Neighbourhoods of the blocks that overcome the filtering, stored only once per block (instead of copying them in
+    # each element of OL): the records of all blocks are concatenated in a single array, in which each block occupies a
+    # range (first its seed records, then its no-seed records) delimited by the offsets
+    def __init__(self):
+        self.chunks = list()
+        self.starts = [0]
+        self.splits = list()
+        self.records = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.splits)
+
+    # Add the neighbourhood of a block (seed and no-seed records) and return the index of the block
+    def add(self, seed, no_seed):
+        self.chunks.append(np.asarray(seed, dtype=np.int32))
+        self.chunks.append(np.asarray(no_seed, dtype=np.int32))
+        self.splits.append(self.starts[-1] + len(seed))
+        self.starts.append(self.splits[-1] + len(no_seed))
+        return len(self.splits) - 1
+
+    # Concatenate the added neighbourhoods (to be called once all the blocks have been added)
+    def build(self):
+        if len(self.chunks) > 0:
+            self.records = np.concatenate(self.chunks)
+        self.chunks = list()
+
+    # Get the seed records of a block
+    def seed(self, block):
+        return self.records[self.starts[block]:self.splits[block]]
+
+    # Get the no-seed records of a block
+    def no_seed(self, block):
+        return self.records[self.splits[block]:self.starts[block + 1]]
+
+    # Get the whole neighbourhood of a block (seed records first)
+    def neighbourhood(self, block):
+        return self.records[self.starts[block]:self.starts[block + 1]]
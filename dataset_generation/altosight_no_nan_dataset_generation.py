@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-import json
+import block_index
 import networkx as nx
 import pandas as pd
 
@@ -64,9 +64,7 @@ def gold_generation(ds_path, gold_path):
 def blocking(ds_dict):
     # Generate blocks
     ds_name = 'altosight_no_nan'
-    blocks_path = "data/" + ds_name + "_blocks.txt"
-    block_costs_path = "data/" + ds_name + "_block_costs.txt"
-    record_blocks_path = "data/" + ds_name + "_record_blocks.txt"
+    block_index_path = "data/" + ds_name + "_block_index"
 
     # Inverted index on 'brand' attribute: generate blocks
     blocks = dict()
@@ -112,13 +110,9 @@ def blocking(ds_dict):
     for cc in nx.connected_components(bg):
         blocks.append(list(cc))
 
-    # Save the generated lists/dictionaries about blocking as JSON
-    with open(blocks_path, 'w') as output_file:
-        json.dump(blocks, output_file)
-    with open(block_costs_path, 'w') as output_file:
-        json.dump(block_cost, output_file)
-    with open(record_blocks_path, 'w') as output_file:
-        json.dump(record_blocks, output_file)
+    # Save the generated blocks, blocking keys of the records and costs of the blocking keys as block index
+    # (compressed sparse rows, referring to the records through their position in the dataset)
+    block_index.write_blocking(block_index_path, [d['id'] for d in ds_dict], blocks, record_blocks, block_cost)
 
 
 def main():
@@ -0,0 +1,19 @@
+class EntityCache(object):
+    # Clusters already resolved by BrewER, shared by the queries of a session (so on the same dataset and matching
+    # function): each record (integer identifier) is mapped to the cluster it belongs to, so that a later query can get
+    # the matches of the record without comparing it with its neighbourhood
+    def __init__(self):
+        self.clusters = dict()
+
+    def __len__(self):
+        return len(self.clusters)
+
+    # Get the cluster of a record (None if the record was never resolved)
+    def get(self, record):
+        return self.clusters.get(record)
+
+    # Insert a resolved cluster
+    def add(self, cluster):
+        cluster = tuple(cluster)
+        for record in cluster:
+            self.clusters[record] = cluster
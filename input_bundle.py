@@ -0,0 +1,276 @@
+import block_index
+import hashlib
+import json
+import numpy as np
+import os
+import pandas as pd
+import record_store
+import task_definition as td
+import trigram_index
+
+# Version of the layout of the bundle: the bundles written with a different layout are rebuilt
+VERSION = 3
+
+
+# Load the dataset in DataFrame format (ordering key forced to numeric, null values of the other attributes as 'NaN')
+def read_dataset(task):
+    ds = pd.read_csv(task.ds_path)
+    ds[task.ordering_key] = pd.to_numeric(ds[task.ordering_key], errors='coerce')
+    for column in ds.columns:
+        if ds[column].dtype == 'object':
+            ds[column] = ds[column].fillna('NaN')
+    return ds
+
+
+# Load the ground truth in DataFrame format and transform it into a set of tuples (matching pairs)
+def read_gold(task):
+    gold = pd.read_csv(task.gold_path)
+    return set(list(gold.itertuples(index=False, name=None)))
+
+
+def read_blocks(task, store):
+    # The blocks are read from the block index of the dataset, built from the JSON files of the blocking if missing (or
+    # rebuilt if they changed since it was built)
+    if not block_index.exists(task.block_index) or stale_blocks(task):
+        convert_blocks(task, store)
+    index = block_index.BlockIndex(task.block_index)
+    if index.fingerprint != store.fingerprint():
+        raise ValueError("The block index " + task.block_index + " does not refer to the dataset " + task.ds_path)
+
+    if task.blocking:
+        # With blocking, each block is an array of integer identifiers (read only when accessed)
+        blocks = index.blocks
+    else:
+        # Without blocking, insert a single block containing all ids
+        blocks = [np.arange(len(store), dtype=np.int32)]
+
+    # The blocks in which a record appears are referred by the indices of their blocking keys in the array of the costs
+    return blocks, index.record_blocks, index.block_costs
+
+
+# Get the paths of the JSON files of the blocking of a task (the ones present)
+def block_sources(task):
+    return [path for path in [task.blocks_path, task.block_costs, task.record_blocks] if os.path.isfile(path)]
+
+
+# Check if the block index of a task was built from the JSON files of the blocking and they changed since then
+# The indices written directly by the dataset generation scripts do not refer to any source file (null sources), while
+# the ones written before the sources were recorded are checked against the JSON files present (if any)
+# Once the index is built, its source files can be removed (it replaces them): if none of them is left, it is kept
+def stale_blocks(task):
+    with open(block_index.description(task.block_index), 'r') as input_file:
+        recorded = json.load(input_file).get('sources', dict())
+    if recorded is None:
+        return False
+    if len(recorded) > 0 and not any(os.path.isfile(path) for path in recorded):
+        return False
+    return sources_changed(block_index.description(task.block_index), block_sources(task))
+
+
+# Build the block index of a dataset from the JSON files of the blocking (as written before the index was introduced)
+def convert_blocks(task, store):
+    # The state of the source files is taken before reading them, so that a later change makes the index stale
+    states = source_states(block_sources(task))
+
+    # The blocks are required only with blocking (otherwise, a single block contains all the records)
+    blocks = list()
+    if os.path.isfile(task.blocks_path):
+        with open(task.blocks_path, 'r') as input_file:
+            blocks = [store.intern(block) for block in json.load(input_file)]
+    elif task.blocking:
+        raise FileNotFoundError("The blocks of the block index " + task.block_index + " are missing: " +
+                                task.blocks_path)
+
+    # Read from the apposite files the blocks in which a record appears and the cost of each block
+    # The blocking keys are identified by their index in the array of the costs
+    with open(task.block_costs, 'r') as input_file:
+        block_costs = json.load(input_file)
+    block_keys = dict((key, index) for index, key in enumerate(block_costs.keys()))
+    # For each record (integer identifier), keep the list of the indices of its blocking keys
+    record_blocks = [list() for _ in range(0, len(store))]
+    with open(task.record_blocks, 'r') as input_file:
+        for record_id, keys in json.load(input_file).items():
+            if record_id in store.id_index:
+                record_blocks[store.id_index[record_id]] = [block_keys[key] for key in keys]
+
+    block_index.write(task.block_index, store.fingerprint(), blocks, record_blocks, list(block_costs.values()), states)
+
+
+# Get the paths of the source files of the inputs of a task
+def sources(task):
+    return [task.ds_path, task.gold_path]
+
+
+def checksum(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as input_file:
+        for chunk in iter(lambda: input_file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Get the state (size, modification time and checksum) of each source file
+def source_states(paths):
+    states = dict()
+    for path in paths:
+        stat = os.stat(path)
+        states[path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'checksum': checksum(path)}
+    return states
+
+
+# Check if the source files changed since their states were recorded in the given manifest (JSON file, see
+# source_states): the checksum of a source file is computed only if its size or modification time changed
+def sources_changed(manifest_path, paths):
+    with open(manifest_path, 'r') as input_file:
+        manifest = json.load(input_file)
+    recorded = manifest.get('sources') or dict()
+    if sorted(recorded.keys()) != sorted(paths):
+        return True
+
+    touched = False
+    for path, source in recorded.items():
+        stat = os.stat(path)
+        if stat.st_size != source['size'] or stat.st_mtime_ns != source['mtime']:
+            if checksum(path) != source['checksum']:
+                return True
+            source['size'] = stat.st_size
+            source['mtime'] = stat.st_mtime_ns
+            touched = True
+    # If the content did not change, keep the new modification times to avoid computing the checksums again
+    if touched:
+        with open(manifest_path, 'w') as output_file:
+            json.dump(manifest, output_file)
+    return False
+
+
+class InputBundle(object):
+    # Preprocessed inputs of the queries on a dataset (record store and ground truth), compiled once into a
+    # directory of NumPy binary files which are memory-mapped at load time, instead of parsing the CSV sources
+    # The bundle is rebuilt automatically when the checksum of one of its source files changes
+    def __init__(self, task):
+        self.task = task
+        self.path = task.bundle_path
+        if self.stale():
+            self.build()
+        self.load()
+
+    def file(self, name):
+        return os.path.join(self.path, name + '.npy')
+
+    # Check if the bundle must be (re)built
+    def stale(self):
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        if not os.path.isfile(manifest_path):
+            return True
+        with open(manifest_path, 'r') as input_file:
+            manifest = json.load(input_file)
+        if manifest['version'] != VERSION or manifest['ordering_key'] != self.task.ordering_key:
+            return True
+        return sources_changed(manifest_path, sources(self.task))
+
+    # Parse the source files and write the bundle
+    def build(self):
+        os.makedirs(self.path, exist_ok=True)
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        if os.path.isfile(manifest_path):
+            os.remove(manifest_path)
+        # The files of the previous build (including the substring indices) are discarded
+        for name in os.listdir(self.path):
+            if name.endswith('.npy'):
+                os.remove(os.path.join(self.path, name))
+
+        # The state of the source files is taken before reading them, so that a later change makes the bundle stale
+        manifest = {'version': VERSION, 'ordering_key': self.task.ordering_key, 'sources': dict(), 'columns': list(),
+                    'textual': list(), 'pickled': list()}
+        manifest['sources'] = source_states(sources(self.task))
+
+        ds = read_dataset(self.task)
+        gold = read_gold(self.task)
+        store = record_store.RecordStore(ds)
+
+        # Each attribute is stored as the array of its values or as the arrays of its codes and of its distinct values
+        # Columns are referred by their position (the names of the attributes may not be valid file names)
+        for index, column in enumerate(ds.columns):
+            manifest['columns'].append(column)
+            np.save(self.file('column' + str(index)), store.columns[column])
+            if column in store.categories:
+                categories = store.categories[column]
+                # Textual values are stored as concatenated UTF-8 strings delimited by offsets (others are pickled)
+                if all(isinstance(value, str) for value in categories):
+                    manifest['textual'].append(column)
+                    encoded = [value.encode('utf-8') for value in categories]
+                    np.save(self.file('categories' + str(index)), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+                    np.save(self.file('category_offsets' + str(index)),
+                            np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64))
+                else:
+                    manifest['pickled'].append(column)
+                    np.save(self.file('categories' + str(index)), categories)
+
+        # The ground truth is stored as the sorted codes of its pairs (of integer identifiers), identified by their
+        # checksum (see matching.GoldMatcher)
+        codes = record_store.sorted_codes(store.intern_pairs(gold))
+        manifest['gold_size'] = len(gold)
+        manifest['gold_checksum'] = hashlib.sha1(codes.tobytes()).hexdigest()
+        np.save(self.file('gold'), codes)
+
+        # The manifest is written last: an interrupted build leaves the bundle stale
+        with open(manifest_path, 'w') as output_file:
+            json.dump(manifest, output_file)
+
+    # Memory-map the files of the bundle and rebuild the inputs
+    # The records are kept in their columnar representation (the DataFrame of the dataset is built only if needed) and
+    # the ground truth as the memory-mapped array of the codes of its pairs
+    def load(self):
+        with open(os.path.join(self.path, 'manifest.json'), 'r') as input_file:
+            manifest = json.load(input_file)
+
+        columns = dict()
+        categories = dict()
+        for index, column in enumerate(manifest['columns']):
+            columns[column] = np.load(self.file('column' + str(index)), mmap_mode='r')
+            if column in manifest['pickled']:
+                categories[column] = np.load(self.file('categories' + str(index)), allow_pickle=True)
+            elif column in manifest['textual']:
+                data = np.load(self.file('categories' + str(index)), mmap_mode='r').tobytes()
+                offsets = np.load(self.file('category_offsets' + str(index)), mmap_mode='r').tolist()
+                categories[column] = np.array([data[offsets[i]:offsets[i + 1]].decode('utf-8')
+                                               for i in range(0, len(offsets) - 1)], dtype=object)
+        self.store = record_store.RecordStore(None, columns, categories)
+
+        self.gold = np.load(self.file('gold'), mmap_mode='r')
+        self.gold_size = manifest['gold_size']
+        self.gold_checksum = manifest['gold_checksum']
+
+    # If required, use the substring indices of the textual attributes appearing in the HAVING conditions of a task
+    # Only the conditions which were not evaluated in advance for the workload (see pre_filtering.prepare_workload) need
+    # an index, so no index is loaded when the whole workload is prepared
+    def index_conditions(self, task):
+        if task.substring_index:
+            for attribute, value in task.having:
+                if attribute in self.store.categories and attribute not in self.store.indices and \
+                        (attribute, value) not in self.store.matches and trigram_index.searchable(value):
+                    self.store.indices[attribute] = self.trigram_index(attribute)
+
+    # Get the trigram index of the distinct values of a textual attribute, building it (once) if not present
+    def trigram_index(self, attribute):
+        name = 'trigrams' + str(self.store.names.index(attribute))
+        if not trigram_index.exists(self.path, name):
+            trigram_index.save(trigram_index.build(self.store.categories[attribute]), self.path, name)
+        return trigram_index.load(self.path, name)
+
+
+def main():
+    # Compile the bundles (and the block indices) of the datasets whose source files are available
+    for task in [td.AlaskaCameraTask(1), td.AlaskaCameraNoNanTask(1), td.AltosightTask(1), td.AltosightNoNanTask(1),
+                 td.AltosightSigmodTask(1), td.AltosightSigmodNoNanTask(1), td.FundingTask(1),
+                 td.FundingNoNanTask(1)]:
+        if all(os.path.isfile(path) for path in sources(task)):
+            bundle = InputBundle(task)
+            print("Bundle of " + task.ds_name + " ready in " + task.bundle_path)
+            if block_index.exists(task.block_index) or os.path.isfile(task.block_costs):
+                read_blocks(task, bundle.store)
+                print("Block index of " + task.ds_name + " ready in " + task.block_index)
+
+
+if __name__ == "__main__":
+    main()
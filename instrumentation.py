@@ -0,0 +1,64 @@
+import collections
+import json
+import time
+
+# Levels of the instrumentation log: a record is kept only if its level does not exceed the configured one
+LEVELS = {'off': 0, 'info': 1, 'debug': 2}
+
+
+class MetricsLog(object):
+    # Structured log of the per-phase timings of BrewER: the records are kept in an in-memory ring buffer and written to
+    # the log file as JSON lines in batches, instead of opening the file each time
+    def __init__(self, path, level='debug', batch_size=1000, buffer_size=100000):
+        self.path = path
+        self.level = LEVELS[level]
+        self.batch_size = batch_size
+
+        # When the buffer is full, the oldest records are discarded (keeping track of their number)
+        self.buffer = collections.deque(maxlen=buffer_size)
+        self.dropped = 0
+
+        # The file is opened only once (and only if the log is enabled)
+        self.output_file = None
+        if self.level > 0:
+            self.output_file = open(self.path, 'a')
+
+    # Check if the records of the given level are kept
+    def enabled(self, level):
+        return self.level >= LEVELS[level]
+
+    # Add a record (phase name and measured values) to the buffer
+    def record(self, level, phase, **values):
+        if self.level < LEVELS[level]:
+            return
+        values['phase'] = phase
+        values['timestamp'] = time.time()
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped = self.dropped + 1
+        self.buffer.append(values)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    # Add a record for the duration of a phase (expressed in milliseconds)
+    def timing(self, level, phase, seconds, **values):
+        self.record(level, phase, ms=round(seconds * 1000, 3), **values)
+
+    # Write the buffered records to the log file
+    def flush(self):
+        if self.output_file is None:
+            return
+        records = list(self.buffer)
+        self.buffer.clear()
+        if self.dropped > 0:
+            records.append({'phase': 'dropped records', 'count': self.dropped, 'timestamp': time.time()})
+            self.dropped = 0
+        if len(records) > 0:
+            self.output_file.write(''.join(json.dumps(record) + '\n' for record in records))
+            self.output_file.flush()
+
+    # Write the remaining records and release the log file
+    def close(self):
+        self.flush()
+        if self.output_file is not None:
+            self.output_file.close()
+            self.output_file = None
@@ -1,322 +1,606 @@
 #!/usr/bin/env python3
 
-import json
-import math
-import networkx as nx
+import aggregation
+import block_table
+import entity_cache
+import hashlib
+import hmac
+import input_bundle
+import instrumentation
+import match_cache
+import matching
 import numpy as np
+import ol_construction
+import ordering_list
 import os
 import pandas as pd
+import pickle
+import pre_filtering
+import record_store
 import task_definition as td
 import time
+import union_find
 
 
-def blocking(task, ds, gold):
-    # Initialize a list containing all the blocks
-    blocks = list()
-    if task.blocking:
-        # With blocking, read the blocks from the dedicated file
-        with open(task.blocks_path, 'r') as input_file:
-            blocks = json.load(input_file)
-    else:
-        # Without blocking, insert a single list containing all ids
-        blocks.append(ds['id'].tolist())
-
-    # If batch version is required, generate the set of candidate pairs performing Cartesian product inside each block
-    candidates = set()
-    if task.batch:
-        for block in blocks:
-            for i in block:
-                for j in block:
-                    if i < j:
-                        candidates.add((i, j))
-                    if i > j:
-                        candidates.add((j, i))
-        print("Number of candidate pairs generated by blocking: " + str(len(candidates)) + '\n',
-              file=open(task.query_output, "a"))
+def candidate_pairs(task, blocks, gold):
+    # Each candidate pair is represented by its code (see record_store.pair_code): the pairs of each block are generated
+    # at once as the upper triangle of its Cartesian product, then the codes of all blocks are sorted and deduplicated
+    codes = [np.empty(0, dtype=np.int64)]
+    for block in blocks:
+        block = np.asarray(block, dtype=np.int64)
+        left, right = np.triu_indices(len(block), 1)
+        codes.append(record_store.pair_codes(block[left], block[right]))
+    candidates = np.unique(np.concatenate(codes))
+    print("Number of candidate pairs generated by blocking: " + str(len(candidates)) + '\n',
+          file=open(task.query_output, "a"))
+    blocking_quality(task, gold, candidates)
 
-        # Measure precision and recall of the blocking method (true positives: intersection between candidates and gold)
-        tp = gold.intersection(candidates)
-        print("Quality of the blocking:", file=open(task.query_output, "a"))
-        print("TP: " + str(len(tp)) + ", FP: " + str(len(gold) - len(tp)) + " => R: " + str(
-            len(tp) / len(gold)) + ", P: " + str(len(tp) / len(candidates)) + '\n', file=open(task.query_output, "a"))
-
-    # Read from the apposite files the blocks in which a record appears and the cost of each block
-    with open(task.record_blocks, 'r') as input_file:
-        record_blocks = json.load(input_file)
-    with open(task.block_costs, 'r') as input_file:
-        block_costs = json.load(input_file)
-
-    return blocks, candidates, record_blocks, block_costs
-
-
-def resolution(ds, cluster, aggregations):
-    # Find the matching elements (contained in the cluster cc) in the dataset
-    matches = ds.loc[ds['id'].isin(cluster)]
-
-    # Create the entity (as a dictionary) according to the specified aggregation functions
-    entity = dict()
-    for item in aggregations.items():
-        if item[1] == 'min':
-            entity[item[0]] = matches[item[0]].min()
-        elif item[1] == 'max':
-            entity[item[0]] = matches[item[0]].max()
-        elif item[1] == 'avg':
-            entity[item[0]] = round(matches[item[0]].mean(), 2)
-        elif item[1] == 'sum':
-            entity[item[0]] = round(matches[item[0]].sum(), 2)
-        elif item[1] == 'vote':
-            try:
-                entity[item[0]] = matches[item[0]].mode(dropna=False).iloc[0]
-            except ValueError:
-                entity[item[0]] = matches[item[0]].min()
-        elif item[1] == 'random':
-            entity[item[0]] = np.random.choice(matches[item[0]])
-        elif item[1] == 'concat':
-            entity[item[0]] = ' ; '.join(matches[item[0]])
+    return candidates
 
-    return entity
 
+def blocking_quality(task, gold, candidates):
+    # Measure precision and recall of the blocking method (true positives: intersection between candidates and gold)
+    tp = np.intersect1d(record_store.sorted_codes(gold), candidates, assume_unique=True)
+    print("Quality of the blocking:", file=open(task.query_output, "a"))
+    print("TP: " + str(len(tp)) + ", FP: " + str(len(gold) - len(tp)) + " => R: " + str(
+        len(tp) / len(gold)) + ", P: " + str(len(tp) / len(candidates)) + '\n', file=open(task.query_output, "a"))
 
-def batch_er(task, ds, candidates, gold):
-    print("BATCH ENTITY RESOLUTION ALGORITHM\n", file=open(task.query_output, "a"))
 
-    # Create an empty graph
-    graph = nx.Graph()
+def batch_er(task, store, candidates, gold):
+    print("BATCH ENTITY RESOLUTION ALGORITHM\n", file=open(task.query_output, "a"))
 
-    # Apply matching function on candidate pairs (verify their presence in gold) and add matches to the graph as edges
-    for match in gold.intersection(candidates):
-        graph.add_edge(match[0], match[1])
+    # Apply matching function on candidate pairs (verify their presence in gold) and merge the sets of matching records
+    matches = np.intersect1d(record_store.sorted_codes(gold), candidates, assume_unique=True)
+    left, right = record_store.pair_records(matches)
+    sets = union_find.UnionFind(len(store))
+    sets.union_pairs(left, right)
 
-    # Detect clusters (connected components) as sets of nodes and call resolution function on them
-    entities = list()
-    for cluster in nx.connected_components(graph):
-        entities.append(resolution(ds, cluster, task.aggregations))
+    # Detect clusters (sets of more than one record) and resolve all of them at once
+    clusters = sets.clusters()
+    entities = aggregation.resolve_clusters(store, clusters, task.aggregations)
 
-    # Create a new dataset without duplicates
-    duplicates = ds.loc[ds['id'].isin(list(graph.nodes))]
-    ds = pd.concat([ds, duplicates], ignore_index=True).drop_duplicates(subset=['id'], keep=False)
+    # Create a new dataset without duplicates (the records belonging to a cluster), through a mask on the records
+    duplicates = np.zeros(len(store), dtype=bool)
+    for cluster in clusters:
+        duplicates[cluster] = True
+    ds = store.ds[~duplicates]
 
     # Return the clean dataset obtained by replacing the removed duplicates with the solved entities
-    return pd.concat([ds, pd.DataFrame(entities)], ignore_index=True).drop_duplicates(subset=['id'], keep=False)
+    return pd.concat([ds, pd.DataFrame(entities)], ignore_index=True)
+
+
+def find_matches(matcher, anchor, neighbours, done):
+    # Do not compare with itself and with elements already inserted in a solved entity
+    # The anchor is already in the bitmap of solved records, so no pair can be compared twice (by a later anchor)
+    candidates = neighbours[~done[neighbours]].tolist()
+    if len(candidates) == 0:
+        return list(), 0
+
+    # Apply the matching function to the whole neighbourhood at once
+    matched = [n for n, outcome in zip(candidates, matcher.match_batch(anchor, candidates)) if outcome]
+
+    # Insert the matching elements in the bitmap of solved records and return them with the number of comparisons
+    done[matched] = True
+    return matched, len(candidates)
+
+
+# Get the anchor records of the next elements of OL to be resolved, taking at most one element from each block, so
+# that their neighbourhoods (anchor and candidate records) can be compared in advance (see matching.Matcher.prefetch)
+# The neighbourhoods are returned only for the anchor records not expected yet (the ones already being compared are
+# given), so that they are computed and hinted only once
+# Only a window of the first elements of OL is scanned, since the first ones often belong to the same giant block
+def next_neighbourhoods(mode, ol, table, done, resolved, depth, expected):
+    anchors = list()
+    neighbourhoods = list()
+    blocks = set()
+    for scanned, element in enumerate(ol.head()):
+        if len(anchors) == depth or scanned == depth * 8:
+            break
+        if 'placeholder' in element or element['solved'] or element['block'] in blocks:
+            continue
+        anchor = element['id'][0]
+        # The records already resolved in a previous query do not need any comparison
+        if resolved is not None and resolved.get(anchor) is not None:
+            continue
+        blocks.add(element['block'])
+        anchors.append(anchor)
+        if anchor not in expected:
+            # A record which is not a seed record (Eager BrewER) is compared with the no-seed records of its block only
+            # if it matches a seed record (see iter_brewer), which is rare: only the comparisons with the seed records
+            # are certainly needed
+            if mode == 'eager' and not element['seed']:
+                neighbours = table.seed(element['block'])
+            else:
+                neighbours = table.neighbourhood(element['block'])
+            neighbours = neighbours[~done[neighbours] & (neighbours != anchor)]
+            neighbourhoods.append((anchor, neighbours.tolist()))
+    return anchors, neighbourhoods
+
+
+class QueryState(object):
+    # State of the progressive ER of a query: OL, bitmap of solved records, table of the neighbourhoods and records of
+    # the blocks (expanded when their placeholders reach the top of OL), together with the number of comparisons, the
+    # emitted entities and the time spent so far
+    # When the execution is suspended (e.g., when its budget is exhausted), it can be resumed from this state
+    def __init__(self, mode, ol, done, table, inserted):
+        self.mode = mode
+        self.ol = ol
+        self.done = done
+        self.table = table
+        self.inserted = inserted
+        self.count = 0
+        # Records resolved (and comparisons saved) by reusing the clusters resolved by the previous queries
+        self.reused_records = 0
+        self.reused_comparisons = 0
+        self.emitted = list()
+        self.elapsed = 0.0
+        self.cache_hits = 0
+        # The query is complete when OL is empty (all its entities have been emitted)
+        self.complete = False
+
+    # Keep the time spent and the number of comparisons answered by the match cache when the execution is suspended
+    def suspend(self, elapsed, cache_hits):
+        self.elapsed = elapsed
+        self.cache_hits = cache_hits
+
+    # Report what remains unresolved: the records still to be compared, the solved entities still to be checked and the
+    # blocks still to be expanded (the ordering key of the first element of OL bounds the ones of the next entities)
+    def remaining(self):
+        report = dict()
+        report['emitted'] = len(self.emitted)
+        report['comparisons'] = self.count
+        report['unresolved_records'] = 0
+        report['unchecked_entities'] = 0
+        report['unexpanded_blocks'] = 0
+        for element in self.ol:
+            if 'placeholder' in element:
+                report['unexpanded_blocks'] = report['unexpanded_blocks'] + 1
+                report['unresolved_records'] = report['unresolved_records'] + element['placeholder'][1] - \
+                    element['placeholder'][0]
+            elif element['solved']:
+                report['unchecked_entities'] = report['unchecked_entities'] + 1
+            else:
+                report['unresolved_records'] = report['unresolved_records'] + 1
+        report['next_ordering_key'] = self.ol.peek()['ordering_key'] if len(self.ol) > 0 else None
+        return report
 
 
-def brewer(mode, task, ds, gold, blocks, record_blocks, block_costs):
+# Perform the preliminary filtering of the blocks and insert the seed records in OL, returning the initial state of the
+# progressive ER of the query
+# The report of the experiment (query output and query details) is written only if required: it is not written when
+# the query is consumed through a cursor, whose pages would append partial rows to the query details
+def start_brewer(mode, task, store, blocks, record_blocks, block_costs, report=True):
     start_time = time.time()
-    if mode == 'lazy':
-        print("\nLAZY BREWER\n", file=open(task.query_output, "a"))
-    else:
-        print("\nEAGER BREWER\n", file=open(task.query_output, "a"))
+    if report:
+        if mode == 'lazy':
+            print("\nLAZY BREWER\n", file=open(task.query_output, "a"))
+        else:
+            print("\nEAGER BREWER\n", file=open(task.query_output, "a"))
 
     # Create the ordering list OL
-    ol = list()
+    ol = ordering_list.OrderingList(task.ordering_mode)
+
+    # Keep a bitmap of already solved records (entities, no need for ER)
+    # From here on, records are always referred by their integer identifiers (index of the DataFrames of the records)
+    done = np.zeros(len(store), dtype=bool)
 
-    # Keep a list of already solved records (entities, no need for ER)
-    done = list()
+    # Keep the neighbourhoods of the blocks in a table, referred by the elements of OL through the index of their block
+    table = block_table.BlockTable()
 
-    # Perform the selection of the seed records (records to be inserted in OL) on each block
-    log_file = "results/log" + str(task.counter) + "_" + mode + ".txt"
+    # Perform the selection of the seed records (records to be inserted in OL) on all the blocks at once
+    log = instrumentation.MetricsLog("results/log" + str(task.counter) + "_" + mode + ".jsonl", task.log_level)
     start_filtering = time.time()
-    # print("start blocking filtering: " + str(start_filtering), file=open(log_file, "a"))
-    for block in blocks:
-        if len(block) == 1:
-            solved = True
+    records, offsets, seeds = pre_filtering.seed_records(task, store, blocks)
+    offsets = offsets.tolist()
+
+    # Ordering key values of the records, with the extreme (worst-case) not null one of each block
+    keys = store.columns[task.ordering_key][records].astype(float)
+    extremes = pre_filtering.block_extremes(keys, offsets, task.ordering_mode)
+
+    # Only the blocks with at least one seed record overcome the filtering
+    # For each of them, collect the records to be inserted in OL (with their ordering key value, solved flag, index of
+    # the block in the table and seed flag)
+    inserted = list()
+    for block in pre_filtering.surviving_blocks(seeds, offsets).tolist():
+        start = offsets[block]
+        end = offsets[block + 1]
+        block_records = records[start:end]
+        block_keys = keys[start:end]
+        block_seeds = seeds[start:end]
+        # Store the neighbourhood of the block (only once for all its records)
+        table_block = table.add(block_records[block_seeds], block_records[~block_seeds])
+        # For Lazy BrewER, insert in OL each record that survives the filtering (seed record)
+        if mode == 'lazy':
+            selected = block_seeds
+            # If 'ignore null' option is set:
+            if task.ignore_null:
+                # First, check that at least one record in the block has a not null ordering key value
+                # If this is true, substitute the null OK values using the extreme (worst-case) one of the block
+                if not np.isnan(extremes[block]):
+                    block_keys = np.where(np.isnan(block_keys), extremes[block], block_keys)
+                else:
+                    # If this is false, actual seed records must be ignored
+                    selected = block_seeds & ~np.isnan(block_keys)
+        # For Eager BrewER, insert in OL the whole block
         else:
-            solved = False
-        block_records = ds.loc[ds['id'].isin(block)]
-        # Perform preliminary filtering on the records of the block
-        seed_records = task.brewer_pre_filtering(block_records, solved)
-        no_seed_records = pd.concat([block_records, seed_records], ignore_index=True).drop_duplicates(subset=['id'],
-                                                                                                      keep=False)
-        # If the block overcomes the filtering (i.e., the list of seed records is not empty)...
-        if len(seed_records.index) > 0:
-            # ...for Lazy BrewER, insert in OL each record that survives the filtering (seed record)
-            if mode == 'lazy':
-                # If 'ignore null' option is set:
-                extreme_ok = pd.NA
-                if task.ignore_null:
-                    # First, check that at least one record in the block has a not null ordering key value
-                    block_records = block_records[block_records[task.ordering_key].notnull()]
-                    # If this is true, select the extreme (worst-case) ordering key value for the emitted entity
-                    if len(block_records.index) > 0:
-                        if task.ordering_mode == 'asc':
-                            extreme_ok = block_records[task.ordering_key].min()
-                        else:
-                            extreme_ok = block_records[task.ordering_key].max()
-                    else:
-                        # If this is false, actual seed records must be ignored
-                        seed_records = seed_records[seed_records[task.ordering_key].notnull()]
-                for index, row in seed_records.iterrows():
-                    # Element to be inserted in OL
-                    element = dict()
-                    # Its attribute 'id' is a list of identifiers, containing at the moment only the one of the record
-                    element['id'] = [row['id']]
-                    # Its attribute 'ordering_key' must be a numeric value (forced cast to float)
-                    # If 'ignore null' option is set, substitute the null OK value using the extreme one
-                    if task.ignore_null and pd.isna(float(row[task.ordering_key])):
-                        element['ordering_key'] = extreme_ok
-                    else:
-                        element['ordering_key'] = float(row[task.ordering_key])
-                    element['solved'] = solved
-                    element['neighbours'] = {'seed': seed_records['id'].tolist(),
-                                             'no_seed': no_seed_records['id'].tolist()}
-                    if element['id'][0] in element['neighbours']['seed']:
-                        element['seed'] = True
-                    else:
-                        element['seed'] = False
-                    ol.append(element)
-            # ...for Eager BrewER, insert in OL the whole block
-            else:
-                # If 'ignore null' option is set, insert the records with null ordering key only as neighbours
-                if task.ignore_null:
-                    block_records = block_records[block_records[task.ordering_key].notnull()]
-                for index, row in block_records.iterrows():
-                    element = dict()
-                    element['id'] = [row['id']]
-                    element['ordering_key'] = float(row[task.ordering_key])
-                    element['solved'] = solved
-                    element['neighbours'] = {'seed': seed_records['id'].tolist(),
-                                             'no_seed': no_seed_records['id'].tolist()}
-                    if element['id'][0] in element['neighbours']['seed']:
-                        element['seed'] = True
-                    else:
-                        element['seed'] = False
-                    ol.append(element)
-    end_filtering = time.time() - start_filtering
-    print("blocking filtering: " + str(round(end_filtering * 1000, 2)), file=open(log_file, "a"))
-
-    print("Number of elements inserted in the ordering list: " + str(len(ol)) + '\n', file=open(task.query_output, "a"))
+            selected = np.ones(end - start, dtype=bool)
+            # If 'ignore null' option is set, insert the records with null ordering key only as neighbours
+            if task.ignore_null:
+                selected = ~np.isnan(block_keys)
+        inserted.append((block_records[selected], block_keys[selected], np.full(selected.sum(), end - start == 1),
+                         np.full(selected.sum(), table_block), block_seeds[selected]))
+    table.build()
+
+    # Concatenate the records to be inserted in OL (the ones of each block are delimited by the ranges)
+    ranges = np.cumsum([0] + [len(columns[0]) for columns in inserted]).tolist()
+    if len(inserted) > 0:
+        inserted = [np.concatenate(column) for column in zip(*inserted)]
+        if task.top_k > 0:
+            # For Top-K queries, each block is inserted in OL as a single placeholder, whose records are inserted only
+            # once it reaches the top of OL (the blocks that cannot contribute to the first K entities stay unexpanded)
+            # Each record keeps the order it would have if all of them were inserted now, so the ties are not affected
+            for start, end in zip(ranges[:-1], ranges[1:]):
+                if start < end:
+                    ol.push(ol_construction.placeholder(inserted[1], start, end, int(inserted[3][start]),
+                                                        task.ordering_mode), start)
+            ol.reserve(ranges[-1])
+        else:
+            # Create the elements of OL and insert them
+            for element in ol_construction.elements(store, task.aggregations, *inserted):
+                ol.push(element)
+    log.timing('info', "blocking filtering", time.time() - start_filtering)
+
+    if report:
+        print("Number of elements inserted in the ordering list: " + str(ranges[-1]) + '\n',
+              file=open(task.query_output, "a"))
 
     # In lazy case (for seed records), compute the number of comparisons to be performed without transitive closure
     start_computation = time.time()
-    # print("start computation of no-blocking comparisons: " + str(start_computation), file=open(log_file, "a"))
-    if mode == 'lazy':
+    if mode == 'lazy' and report:
         considered_blocks = set()
         comparisons_without_closure = 0
-        for record in ol:
-            for block in record_blocks[str(record['id'][0])]:
-                considered_blocks.add(block)
+        if len(inserted) > 0:
+            for record in inserted[0].tolist():
+                for block in record_blocks[record]:
+                    considered_blocks.add(block)
         for block in considered_blocks:
             comparisons_without_closure = comparisons_without_closure + block_costs[block]
         print("Number of comparisons without transitive closure: " + str(comparisons_without_closure) + '\n',
               file=open(task.query_output, "a"))
         with open(task.query_details, 'a') as query_details:
             query_details.write(',' + str(comparisons_without_closure))
-    end_computation = time.time() - start_computation
-    print("computation of no-blocking comparisons: " + str(round(end_computation * 1000, 2)), file=open(log_file, "a"))
-
-    with open(task.query_details, 'a') as query_details:
-        query_details.write(',' + str(len(ol)))
+    log.timing('info', "computation of no-blocking comparisons", time.time() - start_computation)
+    log.close()
 
-    # Perform progressive entity resolution and count the number of comparisons before each emission
+    if report:
+        with open(task.query_details, 'a') as query_details:
+            query_details.write(',' + str(ranges[-1]))
 
-    # Number of comparisons
-    count = 0
-    previous_count = 0
+    query_state = QueryState(mode, ol, done, table, inserted)
+    # The time spent on the filtering is counted in the emission time of the entities
+    query_state.elapsed = time.time() - start_time
+    return query_state
 
-    # List of emitted entities
-    results = list()
 
-    # Number of emitted entities (for Top-K query case)
-    top_k_now = 0
+# Save the number of comparisons performed and of entities emitted by BrewER in the query details whenever its
+# execution stops (also in advance, for a Top-K query or an exhausted budget), so that the columns stay aligned
+def save_details(task, query_state):
+    with open(task.query_details, 'a') as query_details:
+        query_details.write(',' + str(query_state.count) + ',' + str(len(query_state.emitted)))
+
+
+# Check if the budget of the query (if any) is exhausted, given the comparisons performed and the time spent since the
+# execution was started (or resumed)
+def budget_exhausted(task, comparisons, seconds):
+    return (task.max_comparisons > 0 and comparisons >= task.max_comparisons) or \
+        (task.max_seconds > 0 and seconds >= task.max_seconds)
+
+
+def iter_brewer(mode, task, store, matcher, blocks, record_blocks, block_costs, resolved=None, query_state=None,
+                limit=None, report=True):
+    start_resume = time.time()
+    # Start the query from scratch, unless the state of a suspended execution is given
+    if query_state is None:
+        query_state = start_brewer(mode, task, store, blocks, record_blocks, block_costs, report)
+    # The emission stops once the emitted entities reach the limit (by default, the K value of a Top-K query)
+    if limit is None:
+        limit = task.top_k
+    if query_state.complete or 0 < limit <= len(query_state.emitted):
+        return
+    ol = query_state.ol
+    done = query_state.done
+    table = query_state.table
+    inserted = query_state.inserted
 
-    # At each iteration, order OL and check its first element (priority)
+    # Perform progressive entity resolution and count the number of comparisons before each emission
+    # The time and the comparisons answered by the match cache (if any) are counted from the start of the query
+    log = instrumentation.MetricsLog("results/log" + str(task.counter) + "_" + mode + ".jsonl", task.log_level)
+    start_time = time.time() - query_state.elapsed
+    start_hits = matcher.cache_hits - query_state.cache_hits
+    start_count = query_state.count
+    previous_count = query_state.count
+    # Anchor records whose neighbourhoods are being compared in advance (if required)
+    expected = set()
+
+    # At each iteration, check the first element of OL (priority)
     while len(ol) > 0:
-        # OL is always kept sorted on the ordering key (according to the specified ordering mode)
+        # OL is always kept ordered on the ordering key (according to the specified ordering mode)
         start_sorting = time.time()
-        # print("start OL sorting: " + str(start_sorting), file=open(log_file, "a"))
-        if task.ordering_mode == 'asc':
-            ol = sorted(ol, key=lambda x: x['ordering_key'] if not math.isnan(x['ordering_key']) else float('inf'))
-        else:
-            ol = sorted(ol, key=lambda x: x['ordering_key'] if not math.isnan(x['ordering_key']) else float('-inf'),
-                        reverse=True)
-        end_sorting = time.time() - start_sorting
-        print("OL sorting: " + str(round(end_sorting * 1000, 2)), file=open(log_file, "a"))
+        first = ol.peek()
+        log.timing('debug', "OL sorting", time.time() - start_sorting)
         # If the first element of OL is already solved: perform ER, check HAVING clauses on it...
         # ...and eventually emit the entity
         start_check = time.time()
-        # print("start priority check: " + str(start_check), file=open(log_file, "a"))
-        if ol[0]['solved']:
-            # Perform ER on the records represented by the element (identifiers)
-            entity = resolution(ds, ol[0]['id'], task.aggregations)
+        if 'placeholder' in first:
+            # The placeholder of a block reached the top of OL: insert the elements of the records of the block
+            ol.pop()
+            start, end = first['placeholder']
+            elements = ol_construction.elements(store, task.aggregations, *[column[start:end] for column in inserted])
+            for order, element in enumerate(elements, start):
+                ol.push(element, order)
+        elif first['solved']:
+            # Remove the considered element from OL
+            ol.pop()
+            # Perform ER on the records represented by the element, materializing the entity from its aggregate state
+            entity = aggregation.materialize(store, first['state'], task.aggregations)
             # Check HAVING clauses on the entity
             if task.brewer_post_filtering(entity):
                 # Emit the entity keeping in memory the number of comparisons performed before its emission
-                entity['comparisons'] = count
+                entity['comparisons'] = query_state.count
+                entity['cached_comparisons'] = matcher.cache_hits - start_hits
+                entity['reused_records'] = query_state.reused_records
+                entity['reused_comparisons'] = query_state.reused_comparisons
                 # Keep also track of the time necessary for its emission
                 timestamp = time.time()
                 entity['time'] = timestamp - start_time
-                results.append(entity)
-                # Increment the emitted entities counter and check if it fits the (eventual) K value (Top-K query)...
-                # ...if it is equal to K, return the result in advance
-                top_k_now = top_k_now + 1
-                if top_k_now == task.top_k:
-                    return pd.DataFrame(results)
-            # Remove the considered element from OL
-            ol.pop(0)
+                query_state.emitted.append(entity)
+                # The entity is yielded immediately, so that the caller can consume it while resolution continues
+                try:
+                    yield entity
+                except GeneratorExit:
+                    # If the caller stops consuming the entities, write anyway the collected log records
+                    query_state.suspend(time.time() - start_time, matcher.cache_hits - start_hits)
+                    log.close()
+                    raise
+                # Check if the number of emitted entities fits the (eventual) K value (Top-K query)...
+                # ...if it is equal to K, stop the emission in advance (it can be resumed from the state to get more)
+                if len(query_state.emitted) == limit:
+                    query_state.suspend(time.time() - start_time, matcher.cache_hits - start_hits)
+                    log.close()
+                    if report:
+                        save_details(task, query_state)
+                    return
         # If the first element of OL is not solved yet, find the matching neighbours...
         # ...and insert in OL a new element representing them
         else:
-            original_key = ol[0]['ordering_key']
+            # If required, start comparing in advance the neighbourhoods of the next elements to be resolved
+            if task.speculation > 0:
+                anchors, neighbourhoods = next_neighbourhoods(mode, ol, table, done, resolved, task.speculation,
+                                                              expected)
+                matcher.prefetch(anchors, neighbourhoods)
+                expected = set(anchors)
+            original_key = first['ordering_key']
             # Of course, the first (and only guaranteed) matching element is the current record itself (already in 'id')
-            matches = ol[0]['id']
-            # Look for the matches in the neighbourhood
-            if len(ol[0]['neighbours']['no_seed']) > 0:
-                first_no_seed = ol[0]['neighbours']['no_seed'][0]
+            matches = first['id']
+            state = first['state']
+            # The matching elements are inserted in the bitmap of solved records as soon as they are found
+            done[matches[0]] = True
+            no_seed = table.no_seed(first['block'])
+            cluster = None
+            if resolved is not None:
+                cluster = resolved.get(matches[0])
+            if cluster is not None:
+                # If the record was already resolved (in a previous query), its matches are the records of its cluster
+                new_matches = [n for n in cluster if not done[n]]
+                # If the record is not a seed record and does not match any seed record (Eager BrewER) it can be ignored
+                stop = mode == 'eager' and not first['seed'] and len(no_seed) > 0 and \
+                    not np.isin(new_matches, table.seed(first['block'])).any()
+                # Count the comparisons saved (the ones find_matches would have performed on the neighbourhood)
+                saved = int((~done[table.seed(first['block'])]).sum())
+                if not stop:
+                    saved = saved + int((~done[no_seed]).sum())
+                    matches.extend(new_matches)
+                    done[new_matches] = True
+                query_state.reused_records = query_state.reused_records + len(matches)
+                query_state.reused_comparisons = query_state.reused_comparisons + saved
             else:
-                first_no_seed = 'Ciao:)'
-            neighbourhood = ol[0]['neighbours']['seed'] + ol[0]['neighbours']['no_seed']
-            stop = False
-            for n in neighbourhood:
+                # Look for the matches in the neighbourhood (the records of its block), starting from the seed records
+                new_matches, comparisons = find_matches(matcher, matches[0], table.seed(first['block']), done)
+                matches.extend(new_matches)
+                query_state.count = query_state.count + comparisons
                 # If the record is not a seed record and does not match any seed record (Eager BrewER) it can be ignored
-                if mode == 'eager' and n == first_no_seed and not ol[0]['seed']:
-                    if len(matches) == 1:
-                        stop = True
-                        break
-                # Do not compare with itself and with elements already inserted in a solved entity
-                if n not in matches and n not in done:
-                    # Increment the counter of comparisons
-                    count = count + 1
-                    # Application of the matching function
-                    if (matches[0], n) in gold or (n, matches[0]) in gold:
-                        matches.append(n)
+                stop = mode == 'eager' and not first['seed'] and len(no_seed) > 0 and len(matches) == 1
+                if not stop:
+                    new_matches, comparisons = find_matches(matcher, matches[0], no_seed, done)
+                    matches.extend(new_matches)
+                    query_state.count = query_state.count + comparisons
+                    # Keep the resolved cluster for the next queries
+                    if resolved is not None:
+                        resolved.add(matches)
             if not stop:
-                # The ordering key of the new element is the aggregation of the ones of the matches
-                key_aggregation = {task.ordering_key: task.aggregations[task.ordering_key]}
-                entity = resolution(ds, matches, key_aggregation)
+                # Merge the aggregate state of the element with the one of its matches (built at once for all of them)
+                if len(matches) > 1:
+                    state = aggregation.merge_states(task.aggregations, state,
+                                                     aggregation.group_state(store, matches[1:], task.aggregations))
+                # The ordering key of the new element is the aggregation of the ones of the matches (from their states)
+                key_value = aggregation.state_value(store, task.ordering_key, task.aggregations[task.ordering_key],
+                                                    state[task.ordering_key])
                 # Define the new element of OL representing the group of matching elements
                 solved = dict()
                 solved['id'] = matches
-                solved['ordering_key'] = float(entity[task.ordering_key])
+                solved['ordering_key'] = float(key_value)
                 solved['solved'] = True
+                solved['state'] = state
                 # A solved element has no more neighbours
-                solved['neighbours'] = list()
+                solved['block'] = None
                 solved['seed'] = True
-                # Insert the matching elements in the list of solved records
-                done = done + matches
                 # Delete the matching elements from OL
-                ol = [item for item in ol if item['id'][0] not in matches]
+                ol.remove(matches)
                 # Insert in OL the new element representing them
-                ol.append(solved)
+                ol.push(solved)
             else:
-                # Delete the current record from the ordering list and insert it in the list of solved records
-                done = done + matches
-                ol = [item for item in ol if item['id'][0] not in matches]
-        end_check = time.time() - start_check
-        print("check the first element: " + str(round(end_check * 1000, 2)), file=open(log_file, "a"))
-        print("---comparisons count: " + str(count - previous_count), file=open(log_file, "a"))
-        previous_count = count
-    print("Total number of performed comparisons: " + str(count) + '\n', file=open(task.query_output, "a"))
-
-    with open(task.query_details, 'a') as query_details:
-        query_details.write(',' + str(count) + ',' + str(len(results)))
-
-    return pd.DataFrame(results)
-
-
-def main():
-    # Acquire the requirements of the task to be performed
-    for query_index in range(1, 21):
-        task = td.FundingNoNanTask(query_index)
+                # Delete the current record from the ordering list (it is already in the bitmap of solved records)
+                ol.remove(matches)
+        log.timing('debug', "check the first element", time.time() - start_check,
+                   comparisons=query_state.count - previous_count)
+        previous_count = query_state.count
+        # Anytime execution: if the budget is exhausted, suspend the execution (the entities emitted so far have already
+        # been returned) and report what remains unresolved (at least one element is checked at each execution)
+        if len(ol) > 0 and budget_exhausted(task, query_state.count - start_count, time.time() - start_resume):
+            query_state.suspend(time.time() - start_time, matcher.cache_hits - start_hits)
+            log.close()
+            if report:
+                print("Budget exhausted, remaining work: " + str(query_state.remaining()) + '\n',
+                      file=open(task.query_output, "a"))
+                save_details(task, query_state)
+            return
+    query_state.suspend(time.time() - start_time, matcher.cache_hits - start_hits)
+    query_state.complete = True
+    log.close()
+    if not report:
+        return
+    print("Total number of performed comparisons: " + str(query_state.count) + '\n', file=open(task.query_output, "a"))
+    print("Comparisons answered by the match cache: " + str(query_state.cache_hits) + '\n',
+          file=open(task.query_output, "a"))
+    if resolved is not None:
+        print("Records resolved by reusing the clusters of the previous queries: " + str(query_state.reused_records) +
+              " (comparisons saved: " + str(query_state.reused_comparisons) + ")\n", file=open(task.query_output, "a"))
+    save_details(task, query_state)
+
+
+def brewer(mode, task, store, matcher, blocks, record_blocks, block_costs, resolved=None, query_state=None,
+           limit=None, report=True):
+    # Collect in a DataFrame all the entities progressively emitted by BrewER (from the given state, if any)
+    return brewer_state(mode, task, store, matcher, blocks, record_blocks, block_costs, resolved, query_state,
+                        limit, report)[0]
+
+
+# Collect the entities emitted by BrewER as brewer does, returning also the state of its execution: if the execution was
+# suspended (e.g., because its budget was exhausted), it can be resumed by passing the state again
+def brewer_state(mode, task, store, matcher, blocks, record_blocks, block_costs, resolved=None, query_state=None,
+                 limit=None, report=True):
+    if query_state is None:
+        query_state = start_brewer(mode, task, store, blocks, record_blocks, block_costs, report)
+    results = pd.DataFrame(list(iter_brewer(mode, task, store, matcher, blocks, record_blocks, block_costs, resolved,
+                                            query_state, limit, report)))
+    return results, query_state
+
+
+class QueryCursor(object):
+    # Cursor on the entities of a query, returned page by page: the state of BrewER is kept between the pages, so that
+    # each page continues exactly where the previous one stopped, without repeating the filtering and the comparisons
+    def __init__(self, session, mode, task, query_state=None):
+        self.session = session
+        self.mode = mode
+        self.task = task
+        # The pages of a cursor are not reported in the query output and in the query details of the experiments
+        if query_state is None:
+            query_state = start_brewer(mode, task, session.store, session.blocks, session.record_blocks,
+                                       session.block_costs, report=False)
+        self.query_state = query_state
+
+    # Check if all the entities of the query have been returned
+    def exhausted(self):
+        return self.query_state.complete
+
+    # Get the next k entities of the query (fewer if they are over, or if the budget of the query is exhausted)
+    def next_page(self, k):
+        # A limit of zero entities would mean no limit at all (see iter_brewer)
+        if k <= 0:
+            raise ValueError("The size of a page must be positive, not " + str(k))
+        session = self.session
+        return brewer(self.mode, self.task, session.store, session.matcher, session.blocks, session.record_blocks,
+                      session.block_costs, session.reusable(self.task), self.query_state,
+                      len(self.query_state.emitted) + k, report=False)
+
+    # Serialize the cursor (query and state of BrewER), so that it can be restored by another session on the same
+    # dataset and matching function (identified by the fingerprint), e.g., after a restart of the process
+    # The serialized cursor is signed with the secret key of the dataset, since only the cursors serialized by a session
+    # can be safely restored (unpickling arbitrary data can execute arbitrary code)
+    def serialize(self):
+        data = pickle.dumps({'fingerprint': self.session.fingerprint, 'mode': self.mode, 'task': self.task,
+                             'query_state': self.query_state}, protocol=pickle.HIGHEST_PROTOCOL)
+        return hmac.new(self.session.cursor_key(), data, hashlib.sha256).digest() + data
+
+
+class BrewERSession(object):
+    # Inputs of the queries on a dataset (records, ground truth, blocks, match cache and resolved clusters), loaded and
+    # indexed only once and shared by all the tasks executed in the session
+    def __init__(self, task):
+        start_time = time.time()
+        self.task = task
+
+        # Load the record store and the ground truth (codes of the matching pairs) from the binary bundle of the
+        # preprocessed inputs (built from the source files, only if they changed since the last build)
+        self.bundle = input_bundle.InputBundle(task)
+        self.store = self.bundle.store
+        self.gold = self.bundle.gold
+        self.gold_size = self.bundle.gold_size
+
+        # Memory-map the block index of the dataset
+        self.blocks, self.record_blocks, self.block_costs = input_bundle.read_blocks(task, self.store)
+
+        # The candidate pairs are generated only once the first batch task is executed
+        self.candidates = None
+
+        # Use the ground truth as matching function for BrewER
+        # If required, the matching function is applied in background to the next neighbourhoods to be resolved
+        matcher = matching.GoldMatcher(self.gold, self.bundle.gold_checksum)
+        if task.speculation > 0:
+            matcher = matching.SpeculativeMatcher(matcher, task.speculation_workers)
+        # The decisions of the matching function (and the clusters and cursors built on them) refer to the dataset and
+        # to the matching function identified by the fingerprint
+        self.fingerprint = self.store.fingerprint() + ':' + matcher.fingerprint()
+        # If required, keep the decisions of the matching function in the match cache on disk
+        self.cache = None
+        if task.cache_matches:
+            self.cache = match_cache.MatchCache(task.match_cache, self.fingerprint)
+            matcher = matching.CachedMatcher(matcher, self.cache)
+        self.matcher = matcher
+
+        # Keep the clusters resolved by BrewER, to be reused (if required) by the next queries of the session
+        self.resolved = entity_cache.EntityCache()
+
+        # Keep the states of the executions suspended because their budget was exhausted (by task counter and mode)
+        self.suspended = dict()
+
+        self.load_time = time.time() - start_time
+
+    # Get the resolved clusters to be reused by the task (None if it does not reuse them)
+    # When they are reused, the eager run of a query reuses also the clusters resolved by the lazy one, so the numbers
+    # of comparisons of the two runs are not comparable
+    def reusable(self, task):
+        if task.reuse_clusters:
+            return self.resolved
+        return None
+
+    # Check that a task can be executed on the inputs of the session
+    def check(self, task):
+        for attribute in ['ds_path', 'gold_path', 'blocking', 'blocks_path', 'block_costs', 'record_blocks',
+                          'block_index', 'bundle_path', 'cache_matches', 'match_cache', 'ordering_key']:
+            if getattr(task, attribute) != getattr(self.task, attribute):
+                raise ValueError("Task " + str(task.counter) + " does not share the " + attribute + " of the session")
+
+    # Load the substring indices required by the HAVING conditions of a task (counted in the loading time)
+    def index_conditions(self, task):
+        start_time = time.time()
+        self.bundle.index_conditions(task)
+        self.load_time = self.load_time + time.time() - start_time
+
+    # Execute the tasks one after the other
+    def run(self, tasks):
+        # The HAVING conditions of all the tasks are evaluated together in advance (counted in the loading time)
+        start_time = time.time()
+        pre_filtering.prepare_workload(self.store, tasks)
+        self.load_time = self.load_time + time.time() - start_time
+
+        for task in tasks:
+            self.execute(task)
+
+    def execute(self, task):
+        self.check(task)
+        self.index_conditions(task)
+        start_time = time.time()
 
         # Save the query details in the apposite file
         if not os.path.isfile(task.query_details):
@@ -332,28 +616,24 @@ def main():
         # Print the query
         print(task.query, file=open(task.query_output, "a"))
 
-        # Load the dataset in DataFrame format, creating also an alternative version as a list of dictionaries
-        ds = pd.read_csv(task.ds_path)
-        ds[task.ordering_key] = pd.to_numeric(ds[task.ordering_key], errors='coerce')
-        for column in ds.columns:
-            if ds[column].dtype == 'object':
-                ds[column] = ds[column].fillna('NaN')
-        ds_dict = ds.to_dict('records')
-        print("Number of records in the dataset: " + str(len(ds_dict)) + '\n', file=open(task.query_output, "a"))
-
-        # Load the ground truth in DataFrame format and transform it into a set of tuples (matching pairs)
-        gold = pd.read_csv(task.gold_path)
-        gold = set(list(gold.itertuples(index=False, name=None)))
-        print("Number of matching pairs in ground truth: " + str(len(gold)) + '\n', file=open(task.query_output, "a"))
+        print("Number of records in the dataset: " + str(len(self.store)) + '\n', file=open(task.query_output, "a"))
+        print("Number of matching pairs in ground truth: " + str(self.gold_size) + '\n',
+              file=open(task.query_output, "a"))
 
-        # Perform blocking on the dataset
-        blocks, candidates, record_blocks, block_costs = blocking(task, ds, gold)
+        # If batch version is required, generate the candidate pairs (or reuse the ones already generated)
+        if task.batch:
+            if self.candidates is None:
+                self.candidates = candidate_pairs(task, self.blocks, self.gold)
+            else:
+                print("Number of candidate pairs generated by blocking: " + str(len(self.candidates)) + '\n',
+                      file=open(task.query_output, "a"))
+                blocking_quality(task, self.gold, self.candidates)
 
         # If required, perform batch ER on the candidate set to get the cleaned dataset (DataFrame composed by entities)
         # Then, perform the query on the clean dataset
         batch_results = pd.NA
         if task.batch:
-            batch_entities = batch_er(task, ds, candidates, gold)
+            batch_entities = batch_er(task, self.store, self.candidates, self.gold)
             # If 'ignore null' option is set, ignore the entities with null ordering key
             if task.ignore_null:
                 batch_entities = batch_entities[batch_entities[task.ordering_key].notnull()]
@@ -365,11 +645,14 @@ def main():
                 print("No entities satisfied the query\n", file=open(task.query_output, "a"))
 
         # If in a discordant case, perform progressive ER through Lazy BrewER on the dataset
-        brewer_attributes = task.attributes + ['comparisons', 'time']
+        brewer_attributes = task.attributes + ['comparisons', 'cached_comparisons', 'reused_records',
+                                               'reused_comparisons', 'time']
         # if (task.aggregations[task.ordering_key] == 'max' and task.ordering_mode == 'asc') or \
         #         (task.aggregations[task.ordering_key] == 'min' and task.ordering_mode == 'desc'):
         if 1:
-            lazy_results = brewer('lazy', task, ds, gold, blocks, record_blocks, block_costs)
+            lazy_results, query_state = brewer_state('lazy', task, self.store, self.matcher, self.blocks,
+                                                     self.record_blocks, self.block_costs, self.reusable(task))
+            self.keep_state(task, query_state)
             if len(lazy_results.index) > 0:
                 with pd.option_context('display.max_rows', None, 'display.max_columns', None):
                     print(lazy_results.loc[:, brewer_attributes], file=open(task.query_output, "a", encoding="utf-8"))
@@ -378,7 +661,9 @@ def main():
                 print("No entities satisfied the query\n", file=open(task.query_output, "a"))
 
         # Perform progressive ER through Eager BrewER on the dataset
-        eager_results = brewer('eager', task, ds, gold, blocks, record_blocks, block_costs)
+        eager_results, query_state = brewer_state('eager', task, self.store, self.matcher, self.blocks,
+                                                  self.record_blocks, self.block_costs, self.reusable(task))
+        self.keep_state(task, query_state)
         if len(eager_results.index) > 0:
             with pd.option_context('display.max_rows', None, 'display.max_columns', None):
                 print(eager_results.loc[:, brewer_attributes], file=open(task.query_output, "a", encoding="utf-8"))
@@ -405,6 +690,79 @@ def main():
             else:
                 print("One of the two algorithms did not return any entity\n", file=open(task.query_output, "a"))
 
+        # Persist the decisions of the matching function (if cached), to be reused by the next queries
+        if self.cache is not None:
+            self.cache.save()
+
+        # Report the time spent on the query, separately from the time spent loading the inputs of the session
+        print("\nTime to load the inputs (once per session): " + str(round(self.load_time, 3)) + " s",
+              file=open(task.query_output, "a"))
+        print("Time to execute the query: " + str(round(time.time() - start_time, 3)) + " s\n",
+              file=open(task.query_output, "a"))
+
+    # Keep the state of an execution of BrewER on the query of the task, if it was suspended
+    def keep_state(self, task, query_state):
+        if query_state.complete:
+            self.suspended.pop((task.counter, query_state.mode), None)
+        else:
+            self.suspended[(task.counter, query_state.mode)] = query_state
+
+    # Resume the execution of BrewER on the query of the task suspended in the given mode, as a cursor returning its
+    # next entities page by page (the entities emitted before the suspension are not returned again)
+    def resume(self, task, mode='eager'):
+        self.check(task)
+        self.index_conditions(task)
+        if (task.counter, mode) not in self.suspended:
+            raise ValueError("No suspended " + mode + " execution of task " + str(task.counter))
+        return QueryCursor(self, mode, task, self.suspended.pop((task.counter, mode)))
+
+    # Open a cursor on the query of the task, to get its entities page by page
+    def cursor(self, task, mode='eager'):
+        self.check(task)
+        self.index_conditions(task)
+        return QueryCursor(self, mode, task)
+
+    # Get the secret key signing the serialized cursors, generating it the first time (unless another session is
+    # generating it at the same time)
+    def cursor_key(self):
+        if not os.path.isfile(self.task.cursor_key):
+            try:
+                descriptor = os.open(self.task.cursor_key, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(descriptor, 'wb') as output_file:
+                    output_file.write(os.urandom(32))
+            except FileExistsError:
+                pass
+        with open(self.task.cursor_key, 'rb') as input_file:
+            return input_file.read()
+
+    # Restore a serialized cursor, after verifying its signature (before unpickling anything)
+    def restore_cursor(self, data):
+        size = hashlib.sha256().digest_size
+        signature = hmac.new(self.cursor_key(), data[size:], hashlib.sha256).digest()
+        if len(data) <= size or not hmac.compare_digest(data[:size], signature):
+            raise ValueError("The cursor is not signed with the key of the dataset of the session")
+        data = pickle.loads(data[size:])
+        if data['fingerprint'] != self.fingerprint:
+            raise ValueError("The cursor does not refer to the dataset and the matching function of the session")
+        self.check(data['task'])
+        self.index_conditions(data['task'])
+        return QueryCursor(self, data['mode'], data['task'], data['query_state'])
+
+    def close(self):
+        self.matcher.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def main():
+    # Acquire the requirements of the tasks to be performed
+    tasks = [td.FundingNoNanTask(query_index) for query_index in range(1, 21)]
+
+    # Load the inputs only once, then perform all the tasks on them
+    session = BrewERSession(tasks[0])
+    session.run(tasks)
+    session.close()
+
 
 if __name__ == "__main__":
     main()
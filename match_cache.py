@@ -0,0 +1,129 @@
+import collections
+import sqlite3
+
+
+class MatchCache(object):
+    # Cache of the decisions of a matching function (keyed by pair code), shared by all the queries on the same dataset
+    # and persisted on disk in a SQLite database: it keeps at most max_size decisions, evicting the least recently used
+    # The stored decisions are valid only for the same dataset and matching function, identified by the fingerprint
+    # The database is the actual store of the decisions: only the most recently used ones (at most memory_size) are kept
+    # in memory, the others are looked up in batches when needed, so that opening the cache does not read all of them
+    def __init__(self, path, fingerprint, max_size=10000000, memory_size=100000, batch_size=500):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.batch_size = batch_size
+
+        # Decisions kept in memory with their rank (see below), from the least to the most recently used
+        self.recent = collections.OrderedDict()
+
+        # Decisions to be written on disk (inserted, or used with a refreshed rank) since the last save
+        self.pending = dict()
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS decisions "
+                                "(pair INTEGER PRIMARY KEY, outcome INTEGER NOT NULL, rank INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS decisions_rank ON decisions (rank)")
+        stored = self.connection.execute("SELECT value FROM metadata WHERE name = 'fingerprint'").fetchone()
+        if stored is None or stored[0] != self.fingerprint:
+            # The dataset or the matching function changed: the stored decisions are invalidated
+            with self.connection:
+                self.connection.execute("DELETE FROM decisions")
+                self.connection.execute("INSERT OR REPLACE INTO metadata VALUES ('fingerprint', ?)",
+                                        (self.fingerprint,))
+        # The rank of a decision represents its last use: the decisions used later get a higher rank
+        self.next_rank = self.connection.execute("SELECT COALESCE(MAX(rank) + 1, 0) FROM decisions").fetchone()[0]
+        self.evict()
+
+    def __len__(self):
+        self.save()
+        return self.connection.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+
+    # Check if the decision about a pair is stored (without marking it as recently used)
+    def __contains__(self, pair):
+        return pair in self.lookup([pair])
+
+    # Find the stored decisions about the pairs (as a dictionary of outcomes and ranks), first in memory, then on disk
+    def lookup(self, pairs):
+        found = dict()
+        missing = list()
+        for pair in pairs:
+            entry = self.recent.get(pair)
+            if entry is None:
+                entry = self.pending.get(pair)
+            if entry is not None:
+                found[pair] = entry
+            else:
+                missing.append(pair)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            for pair, outcome, rank in self.connection.execute(
+                    "SELECT pair, outcome, rank FROM decisions WHERE pair IN (" + ','.join('?' * len(batch)) + ")",
+                    batch):
+                found[pair] = (bool(outcome), rank)
+        return found
+
+    # Get the stored decision about a pair (None if not present), marking it as recently used
+    def get(self, pair):
+        return self.get_many([pair])[0]
+
+    # Get the stored decisions about the pairs (None for the ones not present), marking them as recently used
+    def get_many(self, pairs):
+        found = self.lookup(pairs)
+        outcomes = list()
+        for pair in pairs:
+            entry = found.get(pair)
+            if entry is None:
+                outcomes.append(None)
+            else:
+                self.use(pair, entry[0], entry[1])
+                outcomes.append(entry[0])
+        return outcomes
+
+    # Store the decision about a pair
+    def put(self, pair, outcome):
+        self.use(pair, outcome)
+
+    # Keep a decision in memory as the most recently used one (a new decision, if its rank is not given)
+    # The rank of a stored decision is refreshed (and written on disk) only if it is getting old, i.e., if it could be
+    # evicted soon: so the eviction is only approximately LRU, but repeated workloads do not rewrite all the decisions
+    def use(self, pair, outcome, rank=None):
+        if rank is None or rank < self.next_rank - self.max_size // 2:
+            rank = self.next_rank
+            self.next_rank = self.next_rank + 1
+            self.pending[pair] = (outcome, rank)
+        self.recent[pair] = (outcome, rank)
+        self.recent.move_to_end(pair)
+        if len(self.recent) > self.memory_size:
+            self.recent.popitem(last=False)
+        # The decisions to be written are not accumulated indefinitely
+        if len(self.pending) >= self.memory_size:
+            self.save()
+
+    # Discard the least recently used decisions exceeding the maximum size (the ones with the lowest ranks)
+    def evict(self):
+        size = self.connection.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        if size > self.max_size:
+            threshold = self.connection.execute("SELECT rank FROM decisions ORDER BY rank LIMIT 1 OFFSET ?",
+                                                (size - self.max_size,)).fetchone()[0]
+            with self.connection:
+                self.connection.execute("DELETE FROM decisions WHERE rank < ?", (threshold,))
+            # The evicted decisions are discarded from memory too
+            self.recent = collections.OrderedDict((pair, entry) for pair, entry in self.recent.items()
+                                                  if entry[1] >= threshold)
+
+    # Write on disk the changes since the last save (only the inserted decisions and the refreshed ranks)
+    def save(self):
+        if len(self.pending) > 0:
+            with self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?)",
+                                            ((pair, int(outcome), rank)
+                                             for pair, (outcome, rank) in self.pending.items()))
+            self.pending = dict()
+        self.evict()
+
+    def close(self):
+        self.save()
+        self.connection.close()
@@ -0,0 +1,173 @@
+import hashlib
+import multiprocessing
+import multiprocessing.pool
+import numpy as np
+import record_store
+
+# Matching function applied by the worker processes of a speculative matcher (inherited when they are forked)
+worker_matcher = None
+
+
+class Matcher(object):
+    # Matching function used by BrewER: it is applied to a whole neighbourhood at once, so that expensive matchers can
+    # amortize their work (e.g., preprocessing the anchor record only once) over all the candidate records
+    # Records are always referred by their integer identifiers
+
+    # Number of decisions taken from a cache instead of applying the matching function
+    cache_hits = 0
+
+    # Identify the matching function (used to invalidate the cached decisions when it changes)
+    def fingerprint(self):
+        return type(self).__name__
+
+    # Check if a pair of records match
+    def match(self, left, right):
+        raise NotImplementedError
+
+    # Check which ones of the candidate records match the anchor record (returning a list of booleans)
+    def match_batch(self, anchor, candidates):
+        return [self.match(anchor, candidate) for candidate in candidates]
+
+    # Hint about the anchor records whose neighbourhoods are going to be compared next, replacing the previous hints,
+    # with the neighbourhoods (pairs of anchor record and candidate records) of the ones not hinted before: matching
+    # functions able to work in background can start comparing them
+    def prefetch(self, anchors, neighbourhoods):
+        pass
+
+    # Release the resources used by the matching function
+    def close(self):
+        pass
+
+
+class GoldMatcher(Matcher):
+    # Oracle matching function: a pair of records match if it appears in the ground truth (set or sorted array of pair
+    # codes, see record_store.sorted_codes), looked up by binary search for a whole neighbourhood at once
+    # The ground truth is identified by the checksum of its sorted codes, computed only if not given (e.g., when it was
+    # already stored in an input bundle)
+    def __init__(self, gold, checksum=None):
+        self.gold = record_store.sorted_codes(gold)
+        self.checksum = checksum
+
+    def fingerprint(self):
+        if self.checksum is None:
+            self.checksum = hashlib.sha1(np.ascontiguousarray(self.gold).tobytes()).hexdigest()
+        return type(self).__name__ + ':' + self.checksum
+
+    def match(self, left, right):
+        return self.match_batch(left, [right])[0]
+
+    def match_batch(self, anchor, candidates):
+        if len(self.gold) == 0:
+            return [False] * len(candidates)
+        codes = record_store.pair_codes(np.full(len(candidates), anchor), candidates)
+        positions = np.minimum(np.searchsorted(self.gold, codes), len(self.gold) - 1)
+        return (self.gold[positions] == codes).tolist()
+
+
+class CachedMatcher(Matcher):
+    # Matching function whose decisions are kept in a match cache (see match_cache.MatchCache), so that repeated
+    # workloads apply the wrapped matching function to each pair only once
+    def __init__(self, matcher, cache):
+        self.matcher = matcher
+        self.cache = cache
+        self.cache_hits = 0
+
+    def fingerprint(self):
+        return self.matcher.fingerprint()
+
+    def match(self, left, right):
+        return self.match_batch(left, [right])[0]
+
+    def match_batch(self, anchor, candidates):
+        # The decisions of the whole neighbourhood are looked up at once
+        outcomes = self.cache.get_many([record_store.pair_code(anchor, candidate) for candidate in candidates])
+
+        # Apply the wrapped matching function only to the pairs not present in the cache
+        missing = [candidate for candidate, outcome in zip(candidates, outcomes) if outcome is None]
+        self.cache_hits = self.cache_hits + len(candidates) - len(missing)
+        if len(missing) > 0:
+            decisions = dict(zip(missing, self.matcher.match_batch(anchor, missing)))
+            for candidate, outcome in decisions.items():
+                self.cache.put(record_store.pair_code(anchor, candidate), outcome)
+            outcomes = [decisions[candidate] if outcome is None else outcome
+                        for candidate, outcome in zip(candidates, outcomes)]
+        return outcomes
+
+    def prefetch(self, anchors, neighbourhoods):
+        # Only the pairs not present in the cache are worth comparing in advance
+        hints = list()
+        for anchor, candidates in neighbourhoods:
+            found = self.cache.lookup([record_store.pair_code(anchor, candidate) for candidate in candidates])
+            hints.append((anchor, [candidate for candidate in candidates
+                                   if record_store.pair_code(anchor, candidate) not in found]))
+        self.matcher.prefetch(anchors, hints)
+
+    def close(self):
+        self.matcher.close()
+
+
+def share_matcher(matcher):
+    global worker_matcher
+    worker_matcher = matcher
+
+
+def worker_decisions(anchor, candidates):
+    return worker_matcher.match_batch(anchor, candidates)
+
+
+class SpeculativeMatcher(Matcher):
+    # Matching function applied speculatively, in a pool of worker processes, to the neighbourhoods that BrewER is going
+    # to resolve next (see prefetch), so that their decisions are ready when they are needed
+    # The decision about a pair does not depend on when it is taken, so the results of BrewER do not change: the
+    # speculative decisions about the neighbourhoods which are no longer expected are simply discarded
+    def __init__(self, matcher, workers):
+        self.matcher = matcher
+        # The worker processes (not limited by the GIL, unlike threads) inherit the matching function when they are
+        # forked, instead of receiving it pickled: without the fork start method, worker threads are used instead
+        # A new neighbourhood is submitted at almost every resolved element, so the tasks are only queued (unlike
+        # concurrent.futures, whose submission wakes up its management thread and waits for it every time)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self.pool = multiprocessing.get_context('fork').Pool(workers, initializer=share_matcher,
+                                                                 initargs=(matcher,))
+            self.compare = worker_decisions
+        else:
+            self.pool = multiprocessing.pool.ThreadPool(workers)
+            self.compare = self.matcher.match_batch
+        # Decisions being taken in background for each anchor record (candidate records and asynchronous result of the
+        # list of their outcomes), which is all that is sent back by the workers
+        self.pending = dict()
+
+    def fingerprint(self):
+        return self.matcher.fingerprint()
+
+    def prefetch(self, anchors, neighbourhoods):
+        # Keep the decisions about the anchor records still expected, and submit only the new neighbourhoods
+        pending = dict()
+        for anchor in anchors:
+            if anchor in self.pending:
+                pending[anchor] = self.pending.pop(anchor)
+        for anchor, candidates in neighbourhoods:
+            if anchor not in pending and len(candidates) > 0:
+                pending[anchor] = (candidates, self.pool.apply_async(self.compare, (anchor, candidates)))
+        # Discard the speculative decisions about the anchor records no longer expected
+        self.pending = pending
+
+    def match(self, left, right):
+        return self.match_batch(left, [right])[0]
+
+    def match_batch(self, anchor, candidates):
+        decisions = dict()
+        if anchor in self.pending:
+            speculated, outcomes = self.pending[anchor]
+            decisions = dict(zip(speculated, outcomes.get()))
+        # Apply the wrapped matching function to the candidates not considered speculatively
+        missing = [candidate for candidate in candidates if candidate not in decisions]
+        if len(missing) > 0:
+            decisions.update(zip(missing, self.matcher.match_batch(anchor, missing)))
+        return [decisions[candidate] for candidate in candidates]
+
+    def close(self):
+        # The speculative decisions still being taken are no longer needed
+        self.pending = dict()
+        self.pool.terminate()
+        self.pool.join()
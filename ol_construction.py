@@ -0,0 +1,42 @@
+import aggregation
+import numpy as np
+
+
+# Create the elements to be inserted in OL, one for each given record (integer identifier) with its ordering key value,
+# its solved flag, the index of its block (in the table of the neighbourhoods) and its seed flag
+def elements(store, aggregations, ids, keys, solved, blocks, seeds):
+    result = list()
+    for index, key, is_solved, block, seed in zip(ids.tolist(), keys.tolist(), solved.tolist(), blocks.tolist(),
+                                                  seeds.tolist()):
+        element = dict()
+        # Its attribute 'id' is a list of identifiers, containing at the moment only the one of the record
+        element['id'] = [index]
+        element['ordering_key'] = key
+        element['solved'] = is_solved
+        # Its aggregate state allows to compute the aggregated values when merged with its matches
+        element['state'] = aggregation.record_state(store, index, aggregations)
+        # Its neighbours are the records of its block (in the table)
+        element['block'] = block
+        element['seed'] = seed
+        result.append(element)
+    return result
+
+
+# Create the placeholder of the elements of a block (the ones in the given range of the records), to be inserted in OL
+# in place of them: its ordering key is the best one among the ones of the elements (null if they are all null), so that
+# it reaches the top of OL before any of them would
+def placeholder(keys, start, end, block, ordering_mode):
+    keys = keys[start:end]
+    keys = keys[~np.isnan(keys)]
+    element = dict()
+    # It is identified by a negative number, not to be confused with the integer identifiers of the records
+    element['id'] = [-1 - block]
+    if len(keys) == 0:
+        element['ordering_key'] = np.nan
+    elif ordering_mode == 'asc':
+        element['ordering_key'] = float(keys.min())
+    else:
+        element['ordering_key'] = float(keys.max())
+    element['solved'] = False
+    element['placeholder'] = (start, end)
+    return element
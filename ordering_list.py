@@ -0,0 +1,84 @@
+import heapq
+import math
+
+
+class OrderingList(object):
+    # The ordering list (OL) is kept as a binary heap on a precomputed sort key, so that the element with the highest
+    # priority can be accessed, removed or inserted in logarithmic time (without sorting the whole list each time)
+    def __init__(self, ordering_mode):
+        self.ordering_mode = ordering_mode
+
+        # Heap of entries [sort key, insertion counter, element]: the counter breaks the ties between elements with the
+        # same ordering key according to their insertion order (as the stable sorting of a list would do)
+        self.heap = list()
+        self.counter = 0
+
+        # Index from the identifier of an element (the first one of its records) to its entry in the heap
+        self.entries = dict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, record_id):
+        return record_id in self.entries
+
+    def __iter__(self):
+        return iter([entry[2] for entry in self.entries.values()])
+
+    # Compute the sort key of an element: the null ordering key values are always placed at the end of OL
+    def sort_key(self, ordering_key):
+        if math.isnan(ordering_key):
+            return float('inf')
+        if self.ordering_mode == 'asc':
+            return ordering_key
+        else:
+            return -ordering_key
+
+    # Insert a new element in OL
+    # By default, the element follows all the previously inserted ones with the same ordering key: an explicit order
+    # allows to insert the elements in a different sequence, breaking the ties as if they were inserted by that order
+    def push(self, element, order=None):
+        if order is None:
+            order = self.counter
+        entry = [self.sort_key(element['ordering_key']), order, element]
+        self.counter = max(self.counter, order + 1)
+        self.entries[element['id'][0]] = entry
+        heapq.heappush(self.heap, entry)
+
+    # Reserve the given number of orders for elements to be inserted later (the next elements will follow them)
+    def reserve(self, count):
+        self.counter = max(self.counter, count)
+
+    # Get the first element of OL (without removing it), discarding the removed entries found on top of the heap
+    def peek(self):
+        while self.heap[0][2] is None:
+            heapq.heappop(self.heap)
+        return self.heap[0][2]
+
+    # Iterate over the elements of OL in order, without removing them: only the part of the heap containing the visited
+    # elements is explored (OL must not be modified during the iteration)
+    def head(self):
+        frontier = list()
+        if len(self.heap) > 0:
+            frontier.append((self.heap[0][0], self.heap[0][1], 0))
+        while len(frontier) > 0:
+            index = heapq.heappop(frontier)[2]
+            if self.heap[index][2] is not None:
+                yield self.heap[index][2]
+            for child in [2 * index + 1, 2 * index + 2]:
+                if child < len(self.heap):
+                    heapq.heappush(frontier, (self.heap[child][0], self.heap[child][1], child))
+
+    # Remove and return the first element of OL
+    def pop(self):
+        element = self.peek()
+        heapq.heappop(self.heap)
+        del self.entries[element['id'][0]]
+        return element
+
+    # Remove from OL the elements identified by the given records (lazy deletion: the entries become tombstones)
+    def remove(self, record_ids):
+        for record_id in record_ids:
+            entry = self.entries.pop(record_id, None)
+            if entry is not None:
+                entry[2] = None
@@ -0,0 +1,99 @@
+import aho_corasick
+import block_index
+import numpy as np
+import pandas as pd
+import trigram_index
+
+
+# Evaluate a HAVING condition (LIKE on the values of an attribute, as in task.brewer_pre_filtering) on all the records
+def condition_mask(store, condition):
+    attribute, value = condition
+    if attribute in store.categories:
+        # If the condition was evaluated in advance, read its outcome on the distinct values of the attribute
+        if (attribute, value) in store.matches:
+            return store.matches[(attribute, value)][store.columns[attribute]]
+        # If the attribute is indexed, the distinct values satisfying the condition are found through the index
+        if attribute in store.indices:
+            codes = store.indices[attribute].search(store.categories[attribute], value)
+            if codes is not None:
+                matches = np.zeros(len(store.categories[attribute]), dtype=bool)
+                matches[codes] = True
+                return matches[store.columns[attribute]]
+        # Otherwise, the condition is evaluated only once for each distinct value of the attribute
+        matches = pd.Series(store.categories[attribute]).str.contains(value, na=False).to_numpy(dtype=bool)
+        return matches[store.columns[attribute]]
+    return pd.Series(store.columns[attribute]).astype(str).str.contains(value, na=False).to_numpy(dtype=bool)
+
+
+# Evaluate in advance the HAVING conditions of a whole workload of queries: for each attribute, the values of all the
+# conditions are compiled into a single Aho-Corasick automaton, so that each distinct value is scanned only once
+# The outcomes are kept in the record store (as masks on the distinct values of the attribute), read by all the queries
+def prepare_workload(store, tasks):
+    patterns = dict()
+    for task in tasks:
+        for attribute, value in task.having:
+            # Only literal substrings are supported (the other conditions are evaluated by each query)
+            if attribute in store.categories and len(value) > 0 and (attribute, value) not in store.matches and \
+                    not any(character in trigram_index.SPECIAL_CHARACTERS for character in value):
+                patterns.setdefault(attribute, set()).add(value)
+
+    for attribute, values in patterns.items():
+        values = sorted(values)
+        automaton = aho_corasick.Automaton(values)
+        masks = np.zeros((len(values), len(store.categories[attribute])), dtype=bool)
+        for code, text in enumerate(store.categories[attribute]):
+            if isinstance(text, str):
+                for index in automaton.search(text):
+                    masks[index, code] = True
+        for index, value in enumerate(values):
+            store.matches[(attribute, value)] = masks[index]
+
+
+# Perform the preliminary filtering of BrewER on all the blocks at once, with the same semantics of the preliminary
+# filtering of the task (task.brewer_pre_filtering) applied to each block
+# Return the records of all the blocks concatenated (the ones of each block sorted as they appear in the dataset), the
+# offsets delimiting the blocks and the mask of the seed records
+def seed_records(task, store, blocks):
+    records, offsets = block_index.concatenate(blocks)
+    sizes = np.diff(offsets)
+    labels = np.repeat(np.arange(len(sizes)), sizes)
+    order = np.lexsort((records, labels))
+    records = records[order]
+
+    # The conditions are evaluated once on the whole columns, then each record reads its outcome
+    first = condition_mask(store, task.having[0])[records]
+    second = condition_mask(store, task.having[1])[records]
+    seeds = first | second
+
+    # If HAVING conditions are in AND, all conditions must be separately satisfied by at least one record appearing in
+    # the block (for already solved records, i.e., blocks of a single record, this means filtering them in AND)
+    if task.operator == 'and':
+        satisfied = np.zeros(len(sizes), dtype=bool)
+        filled = sizes > 0
+        if filled.any():
+            starts = offsets[:-1][filled]
+            satisfied[filled] = np.logical_or.reduceat(first, starts) & np.logical_or.reduceat(second, starts)
+        seeds = seeds & satisfied[labels]
+
+    return records, offsets, seeds
+
+
+# Get the indices of the blocks containing at least one seed record
+def surviving_blocks(seeds, offsets):
+    counts = np.diff(np.r_[0, np.cumsum(seeds, dtype=np.int64)][offsets])
+    return np.flatnonzero(counts > 0)
+
+
+# Get the extreme (worst-case) not null ordering key value of each block (null if all the values are null)
+def block_extremes(keys, offsets, ordering_mode):
+    offsets = np.asarray(offsets)
+    sizes = np.diff(offsets)
+    extremes = np.full(len(sizes), np.nan)
+    filled = sizes > 0
+    if filled.any():
+        with np.errstate(invalid='ignore'):
+            if ordering_mode == 'asc':
+                extremes[filled] = np.fmin.reduceat(keys, offsets[:-1][filled])
+            else:
+                extremes[filled] = np.fmax.reduceat(keys, offsets[:-1][filled])
+    return extremes
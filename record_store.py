@@ -0,0 +1,124 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+# Encode a pair of records (given as integer identifiers) as a single integer, independently from their order
+def pair_code(left, right):
+    if left > right:
+        left, right = right, left
+    return (left << 32) | right
+
+
+# Encode many pairs of records at once (arrays of integer identifiers), as pair_code does
+def pair_codes(left, right):
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+    return (np.minimum(left, right) << 32) | np.maximum(left, right)
+
+
+# Get the codes of a set of pairs as a sorted array (e.g., to intersect it with other arrays of codes)
+# The codes given as an array (e.g., the ground truth of an input bundle) are already sorted
+def sorted_codes(codes):
+    if isinstance(codes, np.ndarray):
+        return codes
+    return np.sort(np.fromiter(codes, dtype=np.int64, count=len(codes)))
+
+
+# Decode the integer identifiers of the records of a pair from its code
+def pair_records(code):
+    return code >> 32, code & 0xFFFFFFFF
+
+
+# Identify a dataset through its record identifiers (the integer identifiers depend on their order)
+def fingerprint(record_ids):
+    return hashlib.sha1('\n'.join(str(record_id) for record_id in record_ids).encode('utf-8')).hexdigest()
+
+
+class RecordStore(object):
+    # Columnar representation of the dataset, built once at load time: each record identifier is interned to a dense
+    # integer (its position in the dataset), so that the records of a cluster are fetched by direct indexing
+    # The integer identifiers are used everywhere in the algorithm, translating them back only to produce the output
+    # The columnar representation can be given already built (e.g., loaded from an input bundle) instead of the
+    # DataFrame, which is then rebuilt from it only if accessed (see ds)
+    def __init__(self, ds, columns=None, categories=None):
+        # Keep each attribute as a NumPy array: numeric attributes store their values, while the other ones store the
+        # codes of their (sorted) distinct values, which are kept in a separate array
+        if columns is not None:
+            self.frame = None
+            self.columns = columns
+            self.categories = categories
+        else:
+            self.frame = ds.reset_index(drop=True)
+            self.columns = dict()
+            self.categories = dict()
+            for column in self.frame.columns:
+                if pd.api.types.is_numeric_dtype(self.frame[column].dtype):
+                    self.columns[column] = self.frame[column].to_numpy()
+                else:
+                    codes, categories = pd.factorize(self.frame[column], sort=True, use_na_sentinel=False)
+                    self.columns[column] = codes
+                    self.categories[column] = np.asarray(categories, dtype=object)
+        # Names of the attributes, in the order of the dataset
+        self.names = list(self.columns.keys())
+
+        # Map each record identifier to its position in the dataset (global id dictionary)
+        self.ids = self.values('id', slice(None))
+        self.id_index = dict(zip(self.ids, range(0, len(self.ids))))
+        # Identifier of the dataset (computed only once, see fingerprint)
+        self.digest = None
+
+        # Codes of the numeric attributes (computed only if required, e.g., for voting)
+        self.numeric_codes = dict()
+
+        # Optional substring indices of the textual attributes (see trigram_index.TrigramIndex)
+        self.indices = dict()
+
+        # Outcomes of the HAVING conditions evaluated in advance for a workload (see pre_filtering.prepare_workload)
+        self.matches = dict()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # DataFrame of the records (e.g., to produce the clean dataset of batch ER)
+    @property
+    def ds(self):
+        if self.frame is None:
+            self.frame = pd.DataFrame(dict((column, self.values(column, slice(None))) for column in self.names),
+                                      columns=self.names)
+        return self.frame
+
+    # Translate the given record identifiers into integer identifiers
+    def intern(self, record_ids):
+        return np.fromiter((self.id_index[record_id] for record_id in record_ids), dtype=np.int32)
+
+    # Translate the given pairs of record identifiers into the codes of the pairs of their integer identifiers
+    # The pairs involving records which do not appear in the dataset are ignored
+    def intern_pairs(self, pairs):
+        codes = set()
+        for pair in pairs:
+            if pair[0] in self.id_index and pair[1] in self.id_index:
+                codes.add(pair_code(self.id_index[pair[0]], self.id_index[pair[1]]))
+        return codes
+
+    # Identify the dataset through its record identifiers
+    def fingerprint(self):
+        if self.digest is None:
+            self.digest = fingerprint(self.ids)
+        return self.digest
+
+    # Get the values assumed by an attribute for the records in the given positions
+    def values(self, attribute, positions):
+        if attribute in self.categories:
+            return self.categories[attribute][self.columns[attribute][positions]]
+        return self.columns[attribute][positions]
+
+    # Get the codes of the values assumed by an attribute, together with the sorted distinct values they refer to
+    def codes(self, attribute):
+        if attribute in self.categories:
+            return self.columns[attribute], self.categories[attribute]
+        if attribute not in self.numeric_codes:
+            # Null values are grouped together and placed after all the other values
+            categories, codes = np.unique(self.columns[attribute], return_inverse=True)
+            self.numeric_codes[attribute] = (codes.reshape(-1), categories)
+        return self.numeric_codes[attribute]
@@ -13,6 +13,19 @@ class AlaskaCameraTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -48,6 +61,26 @@ class AlaskaCameraTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -172,6 +205,19 @@ class AlaskaCameraNoNanTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -207,6 +253,26 @@ class AlaskaCameraNoNanTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -331,6 +397,19 @@ class AltosightTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -367,6 +446,26 @@ class AltosightTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -482,6 +581,19 @@ class AltosightNoNanTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -518,6 +630,26 @@ class AltosightNoNanTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -633,6 +765,19 @@ class AltosightSigmodTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -669,6 +814,26 @@ class AltosightSigmodTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -784,6 +949,19 @@ class AltosightSigmodNoNanTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -820,6 +998,26 @@ class AltosightSigmodNoNanTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -935,6 +1133,19 @@ class FundingTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -971,6 +1182,26 @@ class FundingTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -1085,6 +1316,19 @@ class FundingNoNanTask(object):
         self.eager_output = "results/" + str(self.counter) + "_eager.csv"
         self.query_details = "results/queries.csv"
 
+        # Define the level of the instrumentation log (off, info, debug): it can be completely disabled for production
+        self.log_level = 'debug'
+
+        # Define the number of the next elements of OL (from distinct blocks) whose neighbourhoods are compared in
+        # advance while the current one is resolved (0: no speculation), and the number of workers comparing them
+        self.speculation = 0
+        self.speculation_workers = 1
+
+        # Anytime execution: define the maximum number of comparisons and of seconds to be spent by BrewER on the query,
+        # after which it is suspended, returning the entities emitted so far (<= 0: no budget)
+        self.max_comparisons = 0
+        self.max_seconds = 0
+
         # Define if batch version is required
         self.batch = True
 
@@ -1121,6 +1365,26 @@ class FundingNoNanTask(object):
         self.blocks_path = "data/" + self.ds_name + "_blocks.txt"
         self.block_costs = "data/" + self.ds_name + "_block_costs.txt"
         self.record_blocks = "data/" + self.ds_name + "_record_blocks.txt"
+        # Define the path of the block index (written by dataset generation, or converted from the files above)
+        self.block_index = "data/" + self.ds_name + "_block_index"
+
+        # Define the path of the binary bundle of the preprocessed inputs (rebuilt when the source files change)
+        self.bundle_path = "data/" + self.ds_name + "_bundle"
+
+        # Define if the HAVING conditions must be evaluated through a substring (trigram) index, kept in the bundle
+        self.substring_index = True
+
+        # Define if the decisions of the matching function must be kept in a cache on disk, shared by the queries on the
+        # same dataset (worth it for expensive matching functions: looking up the ground truth is faster), and its path
+        self.cache_matches = False
+        self.match_cache = "results/" + self.ds_name + "_match_cache.db"
+
+        # Define the path of the secret key signing the serialized cursors (generated once, readable only by its owner)
+        self.cursor_key = "results/" + self.ds_name + "_cursor.key"
+
+        # Define if the clusters resolved by the previous queries of the session (also by the lazy run of the same
+        # query) must be reused instead of comparing their records again: the comparisons saved are reported apart
+        self.reuse_clusters = False
 
         # WHERE
 
@@ -0,0 +1,76 @@
+import json
+import os
+import pandas as pd
+import pytest
+import random
+import sys
+
+# The modules of BrewER are at the top level of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import task_definition as td
+
+
+# Write a small synthetic dataset of cameras (with its ground truth and the JSON files of its blocking) in the working
+# directory, with the same layout of the data of the tasks
+def write_dataset(seed):
+    rng = random.Random(seed)
+    os.makedirs('data')
+    os.makedirs('results')
+    records = list()
+    gold = list()
+    entities = list()
+    for entity in range(0, 60):
+        brand = rng.choice(['nikon', 'canon', 'sony', 'olympus'])
+        model = rng.choice(['d800', 'coolpix', 'eos', 'alpha', 'stylus'])
+        ids = list()
+        for copy in range(0, rng.randint(1, 4)):
+            record_id = 'shop' + str(copy) + '//' + str(entity)
+            ids.append(record_id)
+            records.append({'id': record_id, 'description': brand + ' ' + model, 'brand': brand,
+                            'model': model if rng.random() < 0.8 else 'null',
+                            'megapixels': round(rng.uniform(5, 40), 1) if rng.random() < 0.9 else None})
+        gold.extend((left, right) for left in ids for right in ids if left < right)
+        entities.append(ids)
+    pd.DataFrame(records).to_csv('data/alaska_camera_no_nan_dataset.csv', index=False)
+    pd.DataFrame(gold, columns=['left_spec_id', 'right_spec_id']).to_csv('data/alaska_camera_no_nan_gold.csv',
+                                                                         index=False)
+
+    # Each block contains the records of one to three entities
+    blocks = list()
+    while len(entities) > 0:
+        size = rng.randint(1, 3)
+        blocks.append([record_id for ids in entities[:size] for record_id in ids])
+        entities = entities[size:]
+    block_costs = dict(('key' + str(index), len(block) * (len(block) - 1) // 2) for index, block in enumerate(blocks))
+    record_blocks = dict((record_id, ['key' + str(index)]) for index, block in enumerate(blocks)
+                         for record_id in block)
+    for path, content in [('data/alaska_camera_no_nan_blocks.txt', blocks),
+                          ('data/alaska_camera_no_nan_block_costs.txt', block_costs),
+                          ('data/alaska_camera_no_nan_record_blocks.txt', record_blocks)]:
+        with open(path, 'w') as output_file:
+            json.dump(content, output_file)
+
+
+# Create a task on the synthetic dataset, with fixed HAVING conditions and aggregation functions
+def camera_task(counter=1, operator='or'):
+    random.seed(0)
+    task = td.AlaskaCameraNoNanTask(counter)
+    task.batch = False
+    task.log_level = 'off'
+    task.operator = operator
+    task.having = [('brand', 'nikon'), ('model', 'eos')]
+    return task
+
+
+# Work in a temporary directory containing the synthetic dataset
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_dataset(11)
+    return tmp_path
+
+
+@pytest.fixture
+def make_task():
+    return camera_task
@@ -0,0 +1,109 @@
+import aggregation
+import math
+import numpy as np
+import pandas as pd
+import pytest
+import random
+import record_store
+
+AGGREGATIONS = [{'id': 'min', 'brand': 'vote', 'price': 'avg'}, {'id': 'max', 'brand': 'min', 'price': 'sum'},
+                {'brand': 'max', 'price': 'vote'}, {'brand': 'concat', 'price': 'min'}, {'price': 'max'}]
+
+
+def make_store(seed, size=600):
+    rng = np.random.default_rng(seed)
+    # Prices with two decimals (so that many averages are rounding ties) and some null values
+    prices = np.round(rng.uniform(0, 50, size), 2)
+    prices[rng.random(size) < 0.1] = np.nan
+    brands = rng.choice(['canon', 'nikon', 'sony', 'NaN'], size)
+    return record_store.RecordStore(pd.DataFrame({'id': ['r' + str(i) for i in range(0, size)], 'brand': brands,
+                                                  'price': prices}))
+
+
+def random_clusters(seed, size=600, count=300):
+    rng = np.random.default_rng(seed)
+    return [np.sort(rng.choice(size, int(rng.integers(1, 40)), replace=False)) for _ in range(0, count)]
+
+
+def same(left, right):
+    if isinstance(left, float) and np.isnan(left):
+        return isinstance(right, float) and np.isnan(right)
+    return left == right
+
+
+# Reference resolution of a cluster, as done on the DataFrame of the records (only for the deterministic functions)
+def reference(store, cluster, aggregations):
+    records = store.ds.iloc[cluster]
+    entity = dict()
+    for attribute, function in aggregations.items():
+        if function == 'min':
+            entity[attribute] = records[attribute].min()
+        elif function == 'max':
+            entity[attribute] = records[attribute].max()
+        elif function == 'vote':
+            entity[attribute] = records[attribute].mode(dropna=False).iloc[0]
+        elif function == 'concat':
+            entity[attribute] = ' ; '.join(records[attribute])
+    return entity
+
+
+@pytest.mark.parametrize('aggregations', AGGREGATIONS)
+def test_batch_resolution_matches_single_resolution(aggregations):
+    store = make_store(0)
+    clusters = random_clusters(1)
+    entities = aggregation.resolve_clusters(store, clusters, aggregations)
+    for index, cluster in enumerate(clusters):
+        entity = aggregation.resolve(store, cluster, aggregations)
+        expected = reference(store, cluster, aggregations)
+        for attribute in aggregations:
+            assert same(entities[attribute][index], entity[attribute])
+            if attribute in expected:
+                assert same(entity[attribute], expected[attribute])
+
+
+@pytest.mark.parametrize('aggregations', AGGREGATIONS)
+def test_merged_states_do_not_depend_on_the_merge_order(aggregations):
+    store = make_store(2)
+    rng = random.Random(3)
+    for cluster in random_clusters(4):
+        expected = aggregation.resolve(store, cluster, aggregations)
+        # Merge the states of single records in a random order, and of random groups of records
+        order = cluster.tolist()
+        rng.shuffle(order)
+        state = aggregation.record_state(store, order[0], aggregations)
+        for position in order[1:]:
+            state = aggregation.merge_states(aggregations, state,
+                                             aggregation.record_state(store, position, aggregations))
+        split = rng.randint(1, len(order))
+        grouped = aggregation.group_state(store, order[:split], aggregations)
+        if split < len(order):
+            other = aggregation.group_state(store, order[split:], aggregations)
+            grouped = aggregation.merge_states(aggregations, other, grouped)
+        for merged in [state, grouped]:
+            entity = aggregation.materialize(store, merged, aggregations)
+            for attribute, function in aggregations.items():
+                if function == 'concat':
+                    assert sorted(entity[attribute].split(' ; ')) == sorted(expected[attribute].split(' ; '))
+                else:
+                    assert same(entity[attribute], expected[attribute])
+
+
+def test_sums_are_exact():
+    values = [0.1] * 10 + [1e16, 1.0, -1e16]
+    partials = list()
+    for value in values:
+        aggregation.add_partials(partials, value)
+    assert len(partials) < len(values)
+    assert math.fsum(partials) == math.fsum(values) == 2.0
+
+    # Summed sequentially, the prices give 69.53999999999999 (so an average of 17.38): all the paths round the exact sum
+    store = record_store.RecordStore(pd.DataFrame({'id': ['a', 'b', 'c', 'd', 'e'],
+                                                  'price': [4.69, 1.42, 41.79, 21.64, np.nan]}))
+    aggregations = {'price': 'avg'}
+    assert aggregation.resolve_clusters(store, [[0, 1, 2, 3, 4]], aggregations)['price'].tolist() == [17.39]
+    assert aggregation.resolve(store, np.arange(0, 5), aggregations)['price'] == 17.39
+    state = aggregation.record_state(store, 4, aggregations)
+    for position in [2, 0, 3, 1]:
+        state = aggregation.merge_states(aggregations, state, aggregation.record_state(store, position, aggregations))
+    assert aggregation.materialize(store, state, aggregations)['price'] == 17.39
+    assert np.isnan(aggregation.resolve(store, np.array([4]), aggregations)['price'])
@@ -0,0 +1,27 @@
+import aho_corasick
+import random
+
+
+def test_overlapping_patterns():
+    automaton = aho_corasick.Automaton(['he', 'she', 'his', 'hers'])
+    assert automaton.search('ushers') == {0, 1, 3}
+    assert automaton.search('this') == {2}
+    assert automaton.search('') == set()
+    assert automaton.search('xyz') == set()
+
+
+def test_duplicate_and_nested_patterns():
+    automaton = aho_corasick.Automaton(['a', 'aa', 'aa', 'aaa', 'ba'])
+    assert automaton.search('aa') == {0, 1, 2}
+    assert automaton.search('baaa') == {0, 1, 2, 3, 4}
+
+
+def test_random_patterns_match_substring_search():
+    rng = random.Random(7)
+    for _ in range(0, 50):
+        patterns = list(set(''.join(rng.choice('abc') for _ in range(0, rng.randint(1, 4)))
+                            for _ in range(0, rng.randint(1, 12))))
+        automaton = aho_corasick.Automaton(patterns)
+        for _ in range(0, 20):
+            text = ''.join(rng.choice('abcd') for _ in range(0, rng.randint(0, 30)))
+            assert automaton.search(text) == set(index for index, pattern in enumerate(patterns) if pattern in text)
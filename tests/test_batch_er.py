@@ -0,0 +1,53 @@
+import itertools
+import main
+import numpy as np
+import pytest
+import random
+import record_store
+
+
+# Blocks of random records (also overlapping, repeated, of a single record or empty)
+def random_blocks(seed, size=200):
+    rng = random.Random(seed)
+    blocks = [rng.sample(range(0, size), rng.choice([1, 2, 3, 5, 8, 30])) for _ in range(0, 80)]
+    return [np.array(block, dtype=np.int32) for block in blocks + blocks[:5] + [[]]]
+
+
+@pytest.mark.parametrize('seed', range(0, 5))
+def test_candidate_pairs_are_the_pairs_of_each_block(dataset, make_task, seed):
+    task = make_task()
+    blocks = random_blocks(seed)
+    expected = set()
+    for block in blocks:
+        for left, right in itertools.combinations(block.tolist(), 2):
+            expected.add(record_store.pair_code(left, right))
+    gold = set(random.Random(seed).sample(sorted(expected), 20)) | {record_store.pair_code(500, 501)}
+
+    candidates = main.candidate_pairs(task, blocks, gold)
+    assert candidates.tolist() == sorted(expected)
+    with open(task.query_output, 'r') as input_file:
+        output = input_file.read()
+    assert "Number of candidate pairs generated by blocking: " + str(len(expected)) in output
+    assert "TP: 20, FP: 1" in output
+
+
+@pytest.mark.parametrize('operator', ['or', 'and'])
+def test_batch_er_gives_the_entities_of_brewer(dataset, make_task, operator):
+    task = make_task(operator=operator)
+    if operator == 'and':
+        task.having = [('brand', 'n'), ('model', 'o')]
+    session = main.BrewERSession(task)
+    candidates = main.candidate_pairs(task, session.blocks, session.gold)
+    entities = main.batch_er(task, session.store, candidates, session.gold)
+    # The copies of each entity of the synthetic dataset are in the same block, so all of them are merged
+    assert len(entities) == len(set(record_id.split('//')[1] for record_id in session.store.ids.tolist()))
+    if task.ignore_null:
+        entities = entities[entities[task.ordering_key].notnull()]
+    batch_results = task.batch_query(entities)
+
+    eager_results = main.brewer('eager', task, session.store, session.matcher, session.blocks, session.record_blocks,
+                                session.block_costs, report=False)
+    assert len(batch_results) > 0
+    assert sorted(batch_results.fillna(0).to_records(index=False).tolist()) == \
+        sorted(eager_results[task.attributes].fillna(0).to_records(index=False).tolist())
+    session.close()
@@ -0,0 +1,113 @@
+import block_index
+import input_bundle
+import json
+import numpy as np
+import os
+import pytest
+import record_store
+
+
+def test_rows_delimit_the_values_by_offsets():
+    rows = block_index.Rows(np.array([0, 2, 2, 5]), np.array([7, 8, 1, 2, 3]))
+    assert len(rows) == 3
+    assert rows[0].tolist() == [7, 8]
+    assert rows[1].tolist() == []
+    assert [row.tolist() for row in rows] == [[7, 8], [], [1, 2, 3]]
+
+
+def test_concatenate_lists_and_rows():
+    values, offsets = block_index.concatenate([[4, 5], [], [6]])
+    assert values.tolist() == [4, 5, 6]
+    assert offsets.tolist() == [0, 2, 2, 3]
+    rows = block_index.Rows(offsets, values)
+    values, offsets = block_index.concatenate(rows)
+    assert values.tolist() == [4, 5, 6]
+    assert offsets.tolist() == [0, 2, 2, 3]
+    values, offsets = block_index.concatenate([])
+    assert len(values) == 0
+    assert offsets.tolist() == [0]
+
+
+def test_written_index_is_read_back(tmp_path):
+    path = str(tmp_path / 'index')
+    blocks = [[0, 3], [1], [], [2, 4, 5]]
+    record_blocks = [[0], [1], [3], [0], [3], [2, 3]]
+    block_costs = [1, 0, 0, 3]
+    assert not block_index.exists(path)
+    block_index.write(path, 'fingerprint', blocks, record_blocks, block_costs)
+    assert block_index.exists(path)
+
+    index = block_index.BlockIndex(path)
+    assert index.fingerprint == 'fingerprint'
+    assert [block.tolist() for block in index.blocks] == blocks
+    assert [keys.tolist() for keys in index.record_blocks] == record_blocks
+    assert index.block_costs.tolist() == block_costs
+
+
+def test_interrupted_write_leaves_no_index(tmp_path):
+    path = str(tmp_path / 'index')
+    block_index.write(path, 'fingerprint', [[0, 1]], [[0], [0]], [1])
+    # The description is written last: without it, the index does not exist
+    os.remove(block_index.description(path))
+    assert not block_index.exists(path)
+
+
+def test_write_blocking_translates_the_record_identifiers(tmp_path):
+    path = str(tmp_path / 'index')
+    record_ids = ['a', 'b', 'c', 'd']
+    blocks = [['c', 'a'], ['d']]
+    record_blocks = {'a': ['x'], 'c': ['x', 'y'], 'd': ['y']}
+    block_costs = {'x': 1, 'y': 0}
+    block_index.write_blocking(path, record_ids, blocks, record_blocks, block_costs)
+
+    index = block_index.BlockIndex(path)
+    assert index.fingerprint == record_store.fingerprint(record_ids)
+    assert [block.tolist() for block in index.blocks] == [[2, 0], [3]]
+    assert [keys.tolist() for keys in index.record_blocks] == [[0], [], [0, 1], [1]]
+    assert index.block_costs.tolist() == [1, 0]
+
+
+def read_blocks(task):
+    store = input_bundle.InputBundle(task).store
+    blocks, record_blocks, block_costs = input_bundle.read_blocks(task, store)
+    return [store.ids[block].tolist() for block in blocks]
+
+
+def test_index_is_kept_when_its_sources_are_removed(dataset, make_task):
+    task = make_task()
+    with open(task.blocks_path, 'r') as input_file:
+        expected = json.load(input_file)
+    assert read_blocks(task) == expected
+    for path in [task.blocks_path, task.block_costs, task.record_blocks]:
+        os.remove(path)
+    assert read_blocks(task) == expected
+
+
+def test_missing_blocks_are_not_replaced_by_an_empty_index(dataset, make_task):
+    task = make_task()
+    read_blocks(task)
+    os.remove(task.blocks_path)
+    with pytest.raises(FileNotFoundError):
+        read_blocks(task)
+    # Without blocking, the blocks are not needed
+    task.blocking = False
+    assert len(read_blocks(task)) == 1
+
+
+def test_index_is_rebuilt_when_its_sources_change(dataset, make_task):
+    task = make_task()
+    with open(task.blocks_path, 'r') as input_file:
+        blocks = json.load(input_file)
+    read_blocks(task)
+    built = os.stat(block_index.file(task.block_index, 'block_records')).st_mtime_ns
+
+    # Touching the sources without changing them does not rebuild the index
+    os.utime(task.blocks_path, ns=(built + 10 ** 9, built + 10 ** 9))
+    assert read_blocks(task) == blocks
+    assert os.stat(block_index.file(task.block_index, 'block_records')).st_mtime_ns == built
+
+    # Two blocks are merged
+    blocks = [blocks[0] + blocks[1]] + blocks[2:]
+    with open(task.blocks_path, 'w') as output_file:
+        json.dump(blocks, output_file)
+    assert read_blocks(task) == blocks
@@ -0,0 +1,77 @@
+import main
+import pandas as pd
+import pytest
+
+
+def test_budget_is_exhausted_by_comparisons_or_time(make_task):
+    task = make_task()
+    assert not main.budget_exhausted(task, 10 ** 6, 10 ** 6)
+    task.max_comparisons = 10
+    assert not main.budget_exhausted(task, 9, 10 ** 6)
+    assert main.budget_exhausted(task, 10, 0)
+    task.max_comparisons = 0
+    task.max_seconds = 2
+    assert not main.budget_exhausted(task, 10 ** 6, 1.5)
+    assert main.budget_exhausted(task, 0, 2)
+
+
+@pytest.mark.parametrize('mode', ['lazy', 'eager'])
+def test_suspended_executions_resume_where_they_stopped(dataset, make_task, mode):
+    task = make_task()
+    session = main.BrewERSession(task)
+    expected = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                           session.block_costs, report=False)
+
+    task.max_comparisons = 15
+    pages = list()
+    query_state = None
+    while query_state is None or not query_state.complete:
+        results, query_state = main.brewer_state(mode, task, session.store, session.matcher, session.blocks,
+                                                 session.record_blocks, session.block_costs, query_state=query_state,
+                                                 report=False)
+        pages.append(results)
+        remaining = query_state.remaining()
+        assert remaining['emitted'] == sum(len(page) for page in pages)
+        assert remaining['comparisons'] == query_state.count
+        if not query_state.complete:
+            # The execution stops only once its budget is exhausted, with some work left
+            assert remaining['unresolved_records'] + remaining['unchecked_entities'] > 0
+            assert remaining['next_ordering_key'] is not None
+    assert len(pages) > 2
+    assert remaining['next_ordering_key'] is None
+
+    # The entities of the resumed executions (and their numbers of comparisons) are the ones of the whole execution
+    results = pd.concat(pages, ignore_index=True)
+    assert results[task.attributes].equals(expected[task.attributes])
+    assert (results['comparisons'] == expected['comparisons']).all()
+    session.close()
+
+
+def test_session_keeps_the_suspended_executions(dataset, make_task):
+    task = make_task()
+    session = main.BrewERSession(task)
+    expected = main.brewer('eager', task, session.store, session.matcher, session.blocks, session.record_blocks,
+                           session.block_costs, report=False)
+
+    task.max_comparisons = 70
+    session.execute(task)
+    emitted = pd.read_csv(task.eager_output)
+    assert 0 < len(emitted) < len(expected)
+    assert sorted(session.suspended.keys()) == [(task.counter, 'eager'), (task.counter, 'lazy')]
+
+    # Resuming the execution returns only the entities not emitted before the suspension
+    cursor = session.resume(task, 'eager')
+    assert (task.counter, 'eager') not in session.suspended
+    with pytest.raises(ValueError):
+        session.resume(task, 'eager')
+    task.max_comparisons = 0
+    results = cursor.next_page(len(expected))
+    assert cursor.exhausted()
+    pd.testing.assert_frame_equal(pd.concat([emitted[task.attributes], results[task.attributes]], ignore_index=True),
+                                  expected[task.attributes], check_dtype=False)
+
+    # The query details of the suspended executions stay aligned with their header
+    with open(task.query_details, 'r') as input_file:
+        header, details = input_file.read().splitlines()
+    assert details.count(',') == header.count(',')
+    session.close()
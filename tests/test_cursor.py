@@ -0,0 +1,88 @@
+import main
+import os
+import pandas as pd
+import pickle
+import pytest
+
+
+@pytest.fixture
+def session(dataset, make_task):
+    session = main.BrewERSession(make_task())
+    yield session
+    session.close()
+
+
+def entities(results, task):
+    return results[task.attributes + ['comparisons']].astype(str).values.tolist()
+
+
+@pytest.mark.parametrize('mode', ['lazy', 'eager'])
+def test_pages_continue_the_query(session, make_task, mode):
+    task = make_task()
+    expected = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                           session.block_costs, report=False)
+    assert len(expected) > 10
+
+    cursor = session.cursor(task, mode)
+    pages = list()
+    while not cursor.exhausted():
+        pages.append(cursor.next_page(4))
+    assert all(len(page) <= 4 for page in pages)
+    assert entities(pd.concat(pages, ignore_index=True), task) == entities(expected, task)
+    # A page after the last one is empty
+    assert len(cursor.next_page(4)) == 0
+
+
+def test_pages_are_not_reported(session, make_task):
+    task = make_task()
+    cursor = session.cursor(task, 'lazy')
+    while not cursor.exhausted():
+        cursor.next_page(5)
+    assert not os.path.exists(task.query_details)
+    assert not os.path.exists(task.query_output)
+
+
+@pytest.mark.parametrize('k', [0, -3])
+def test_page_size_must_be_positive(session, make_task, k):
+    cursor = session.cursor(make_task(), 'eager')
+    with pytest.raises(ValueError):
+        cursor.next_page(k)
+    assert len(cursor.query_state.emitted) == 0
+
+
+@pytest.mark.parametrize('mode', ['lazy', 'eager'])
+def test_restored_cursor_continues_in_another_session(session, make_task, mode):
+    task = make_task()
+    cursor = session.cursor(task, mode)
+    first = cursor.next_page(6)
+    data = cursor.serialize()
+    rest = cursor.next_page(1000)
+
+    other = main.BrewERSession(make_task())
+    try:
+        restored = other.restore_cursor(data)
+        assert entities(restored.next_page(1000), task) == entities(rest, task)
+        assert restored.exhausted()
+    finally:
+        other.close()
+    assert len(first) == 6
+
+
+class Payload(object):
+    def __reduce__(self):
+        return (os.mkdir, ('unpickled',))
+
+
+def test_tampered_cursors_are_rejected(session, make_task):
+    cursor = session.cursor(make_task(), 'lazy')
+    cursor.next_page(2)
+    data = cursor.serialize()
+    forged = pickle.dumps(Payload())
+    for invalid in [data[:-1] + bytes([data[-1] ^ 1]), bytes(32) + forged, forged, b'']:
+        with pytest.raises(ValueError):
+            session.restore_cursor(invalid)
+    assert not os.path.exists('unpickled')
+    # Only the owner can read the key which signs the cursors
+    assert os.stat(make_task().cursor_key).st_mode & 0o777 == 0o600
+    # The original payload is still accepted
+    assert len(session.restore_cursor(data).query_state.emitted) == 2
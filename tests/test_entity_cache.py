@@ -0,0 +1,44 @@
+import entity_cache
+import main
+import pytest
+
+
+def test_records_are_mapped_to_their_clusters():
+    resolved = entity_cache.EntityCache()
+    resolved.add([4, 1, 9])
+    resolved.add([2])
+    assert len(resolved) == 4
+    assert resolved.get(9) == (4, 1, 9)
+    assert resolved.get(2) == (2,)
+    assert resolved.get(3) is None
+
+
+@pytest.mark.parametrize('operator', ['or', 'and'])
+def test_reused_clusters_give_the_same_entities(dataset, make_task, operator):
+    task = make_task(operator=operator)
+    if operator == 'and':
+        task.having = [('brand', 'n'), ('model', 'o')]
+    session = main.BrewERSession(task)
+    expected = dict()
+    for mode in ['lazy', 'eager']:
+        expected[mode] = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                                     session.block_costs, report=False)
+        assert len(expected[mode]) > 0
+
+    # The lazy run resolves the clusters reused by the eager one, which then saves all its comparisons
+    task.reuse_clusters = True
+    resolved = session.reusable(task)
+    assert len(resolved) == 0
+    for mode in ['lazy', 'eager']:
+        results = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                              session.block_costs, resolved, report=False)
+        assert results[task.attributes].equals(expected[mode][task.attributes])
+        if mode == 'lazy':
+            assert (results['comparisons'] == expected[mode]['comparisons']).all()
+            assert (results['reused_records'] == 0).all()
+        else:
+            assert results['comparisons'].max() < expected[mode]['comparisons'].max()
+            assert results['reused_records'].max() > 0
+            assert results['reused_comparisons'].max() > 0
+    assert len(resolved) > 0
+    session.close()
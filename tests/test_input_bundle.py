@@ -0,0 +1,58 @@
+import input_bundle
+import matching
+import numpy as np
+import os
+import pandas as pd
+import record_store
+
+
+def gold_time(task):
+    return os.stat(os.path.join(task.bundle_path, 'gold.npy')).st_mtime_ns
+
+
+def test_bundle_gives_the_parsed_inputs(dataset, make_task):
+    task = make_task()
+    ds = input_bundle.read_dataset(task)
+    expected = record_store.RecordStore(ds)
+    gold = expected.intern_pairs(input_bundle.read_gold(task))
+
+    for _ in range(0, 2):
+        bundle = input_bundle.InputBundle(task)
+        store = bundle.store
+        assert store.names == list(ds.columns)
+        assert store.ids.tolist() == ds['id'].tolist()
+        assert store.fingerprint() == expected.fingerprint()
+        for column in ds.columns:
+            assert np.array_equal(store.columns[column], expected.columns[column], equal_nan=True)
+        pd.testing.assert_frame_equal(store.ds, ds, check_dtype=False)
+        # The ground truth is the sorted array of the codes of its pairs, identified by the checksum in the manifest
+        assert bundle.gold.tolist() == sorted(gold)
+        assert bundle.gold_size == len(input_bundle.read_gold(task))
+        assert matching.GoldMatcher(bundle.gold, bundle.gold_checksum).fingerprint() == \
+            matching.GoldMatcher(gold).fingerprint()
+
+
+def test_bundle_is_rebuilt_only_when_its_sources_change(dataset, make_task):
+    task = make_task()
+    input_bundle.InputBundle(task)
+    built = gold_time(task)
+
+    # Touching a source file without changing it does not rebuild the bundle
+    os.utime(task.gold_path, ns=(built + 10 ** 9, built + 10 ** 9))
+    assert not input_bundle.InputBundle(task).stale()
+    assert gold_time(task) == built
+
+    # A changed ground truth is loaded again
+    gold = pd.read_csv(task.gold_path)
+    gold.iloc[1:].to_csv(task.gold_path, index=False)
+    bundle = input_bundle.InputBundle(task)
+    assert bundle.gold_size == len(gold) - 1
+    assert len(bundle.gold) == len(gold) - 1
+
+    # As well as a changed dataset
+    ds = pd.read_csv(task.ds_path)
+    ds.loc[0, 'brand'] = 'leica'
+    ds.to_csv(task.ds_path, index=False)
+    bundle = input_bundle.InputBundle(task)
+    assert bundle.store.values('brand', [0])[0] == 'leica'
+    assert 'leica' in bundle.store.categories['brand']
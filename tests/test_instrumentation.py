@@ -0,0 +1,47 @@
+import instrumentation
+import json
+import os
+
+
+def read_records(path):
+    with open(path, 'r') as input_file:
+        return [json.loads(line) for line in input_file]
+
+
+def test_records_are_written_in_batches(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = instrumentation.MetricsLog(path, 'info', batch_size=3)
+    log.timing('info', "blocking filtering", 0.0125)
+    log.timing('debug', "OL sorting", 0.001)
+    log.record('info', "check the first element", comparisons=4)
+    assert read_records(path) == list()
+    log.record('info', "check the first element", comparisons=2)
+    # The records of a higher level than the configured one are not kept
+    assert [record['phase'] for record in read_records(path)] == ["blocking filtering", "check the first element",
+                                                                   "check the first element"]
+    log.record('info', "last")
+    log.close()
+    records = read_records(path)
+    assert [record['phase'] for record in records][-1] == "last"
+    assert records[0]['ms'] == 12.5
+    assert records[1]['comparisons'] == 4
+
+
+def test_full_buffer_drops_the_oldest_records(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = instrumentation.MetricsLog(path, 'debug', batch_size=10, buffer_size=4)
+    for index in range(0, 6):
+        log.record('debug', "phase", index=index)
+    log.close()
+    records = read_records(path)
+    assert [record['index'] for record in records[:-1]] == [2, 3, 4, 5]
+    assert records[-1]['phase'] == "dropped records" and records[-1]['count'] == 2
+
+
+def test_disabled_log_writes_nothing(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    log = instrumentation.MetricsLog(path, 'off')
+    assert not log.enabled('info')
+    log.timing('info', "blocking filtering", 1.0)
+    log.close()
+    assert not os.path.exists(path)
@@ -0,0 +1,123 @@
+import main
+import match_cache
+import matching
+import os
+
+
+def test_decisions_persist_for_the_same_fingerprint(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = match_cache.MatchCache(path, 'dataset:matcher')
+    cache.put(1, True)
+    cache.put(2, False)
+    assert cache.get(1) is True
+    assert cache.get(3) is None
+    cache.close()
+
+    cache = match_cache.MatchCache(path, 'dataset:matcher')
+    assert len(cache) == 2
+    assert cache.get_many([2, 3, 1]) == [False, None, True]
+    cache.close()
+
+    # The decisions of another dataset or matching function are discarded
+    cache = match_cache.MatchCache(path, 'dataset:other')
+    assert len(cache) == 0
+    assert cache.get(1) is None
+    cache.close()
+
+
+def test_batched_lookups_beyond_the_memory(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = match_cache.MatchCache(path, 'fingerprint', memory_size=4, batch_size=3)
+    for pair in range(0, 50):
+        cache.put(pair, pair % 3 == 0)
+    cache.close()
+
+    # Only a few decisions are kept in memory: the others are looked up on disk in batches
+    cache = match_cache.MatchCache(path, 'fingerprint', memory_size=4, batch_size=3)
+    pairs = list(range(60, 40, -1)) + list(range(0, 10))
+    assert cache.get_many(pairs) == [None if pair >= 50 else pair % 3 == 0 for pair in pairs]
+    assert len(cache.recent) <= 4
+    assert 7 in cache
+    assert 70 not in cache
+    cache.close()
+
+
+def test_least_recently_used_decisions_are_evicted(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = match_cache.MatchCache(path, 'fingerprint', max_size=4)
+    for pair in [1, 2, 3, 4]:
+        cache.put(pair, True)
+    # Using the oldest decision makes it the most recently used one
+    assert cache.get(1) is True
+    cache.put(5, False)
+    cache.put(6, False)
+    cache.save()
+    assert len(cache) == 4
+    assert [pair in cache for pair in [1, 2, 3, 4, 5, 6]] == [True, False, False, True, True, True]
+    cache.close()
+
+    # The eviction is applied to the decisions on disk, and survives a reopening
+    cache = match_cache.MatchCache(path, 'fingerprint', max_size=4)
+    assert cache.get_many([1, 2, 3, 4, 5, 6]) == [True, None, None, True, False, False]
+    cache.close()
+
+
+def test_pending_decisions_are_written_when_the_memory_is_full(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = match_cache.MatchCache(path, 'fingerprint', memory_size=10)
+    for pair in range(0, 25):
+        cache.put(pair, True)
+    assert len(cache.pending) < 10
+    # A second connection sees the decisions written so far
+    other = match_cache.MatchCache(path, 'fingerprint')
+    assert all(pair in other for pair in range(0, 20))
+    other.close()
+    cache.close()
+
+
+class CountingMatcher(matching.Matcher):
+    # Matching function counting the pairs it compares: two records match if their identifiers have the same parity
+    def __init__(self):
+        self.pairs = list()
+
+    def match(self, left, right):
+        self.pairs.append((left, right))
+        return left % 2 == right % 2
+
+
+def test_cached_matcher_compares_only_the_missing_pairs(tmp_path):
+    cache = match_cache.MatchCache(str(tmp_path / 'cache.db'), 'fingerprint')
+    wrapped = CountingMatcher()
+    matcher = matching.CachedMatcher(wrapped, cache)
+    assert matcher.match_batch(2, [4, 5, 6]) == [True, False, True]
+    assert matcher.cache_hits == 0
+    # The decisions do not depend on the order of the pair
+    assert matcher.match_batch(5, [2, 7, 4]) == [False, True, False]
+    assert matcher.cache_hits == 1
+    assert wrapped.pairs == [(2, 4), (2, 5), (2, 6), (5, 7), (5, 4)]
+    matcher.close()
+    cache.close()
+
+
+def test_sessions_cache_the_decisions_only_if_required(dataset, make_task):
+    task = make_task()
+    session = main.BrewERSession(task)
+    assert session.cache is None
+    expected = main.brewer('lazy', task, session.store, session.matcher, session.blocks, session.record_blocks,
+                           session.block_costs, report=False)
+    session.close()
+    assert not os.path.exists(task.match_cache)
+    assert (expected['cached_comparisons'] == 0).all()
+
+    # With the cache, a second session answers all the comparisons from the decisions of the first one
+    task.cache_matches = True
+    for cached in [False, True]:
+        session = main.BrewERSession(task)
+        results = main.brewer('lazy', task, session.store, session.matcher, session.blocks, session.record_blocks,
+                              session.block_costs, report=False)
+        session.close()
+        assert results[task.attributes + ['comparisons']].equals(expected[task.attributes + ['comparisons']])
+        if cached:
+            assert (results['cached_comparisons'] == results['comparisons']).all()
+        else:
+            assert (results['cached_comparisons'] == 0).all()
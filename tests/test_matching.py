@@ -0,0 +1,74 @@
+import main
+import matching
+import pytest
+import record_store
+
+
+class ParityMatcher(matching.Matcher):
+    # Matching function defined pair by pair: two records match if their identifiers have the same parity
+    def match(self, left, right):
+        return left % 2 == right % 2
+
+
+def test_gold_matcher_does_not_depend_on_the_order_of_the_pair():
+    matcher = matching.GoldMatcher({record_store.pair_code(3, 1), record_store.pair_code(2, 7)})
+    assert matcher.match(1, 3) and matcher.match(3, 1) and matcher.match(7, 2)
+    assert not matcher.match(1, 2)
+    assert matcher.match_batch(2, [7, 1, 3, 2]) == [True, False, False, False]
+    assert matcher.fingerprint() == matching.GoldMatcher({record_store.pair_code(1, 3),
+                                                          record_store.pair_code(7, 2)}).fingerprint()
+    assert matcher.fingerprint() != matching.GoldMatcher({record_store.pair_code(1, 3)}).fingerprint()
+    # The same ground truth given as the sorted array of its codes
+    codes = record_store.sorted_codes({record_store.pair_code(3, 1), record_store.pair_code(2, 7)})
+    assert matching.GoldMatcher(codes).match_batch(2, [7, 1, 3, 2]) == [True, False, False, False]
+    assert matching.GoldMatcher(codes).fingerprint() == matcher.fingerprint()
+    assert matching.GoldMatcher(set()).match_batch(1, [2, 3]) == [False, False]
+
+
+def test_batches_default_to_single_pairs():
+    matcher = ParityMatcher()
+    assert matcher.match_batch(4, [1, 2, 3, 8]) == [False, True, False, True]
+    assert matcher.fingerprint() == 'ParityMatcher'
+    # Hints are ignored by the matching functions which cannot work in background
+    matcher.prefetch([4], [(4, [1, 2])])
+    matcher.close()
+
+
+def test_speculative_decisions_are_the_same_as_the_wrapped_ones():
+    matcher = matching.SpeculativeMatcher(ParityMatcher(), 2)
+    assert matcher.fingerprint() == 'ParityMatcher'
+    matcher.prefetch([4, 5], [(4, [1, 2, 3]), (5, [1, 2])])
+    # Candidates not hinted are compared on demand, and the anchors no longer hinted are discarded
+    assert matcher.match_batch(4, [3, 2, 6]) == [False, True, True]
+    matcher.prefetch([5, 7], [(7, [1, 8])])
+    assert sorted(matcher.pending.keys()) == [5, 7]
+    assert matcher.match_batch(5, [2, 1]) == [False, True]
+    assert matcher.match_batch(7, [8, 1]) == [False, True]
+    assert matcher.match(9, 4) is False
+    matcher.close()
+
+
+@pytest.mark.parametrize('operator', ['or', 'and'])
+def test_speculation_gives_the_same_entities_and_comparisons(dataset, make_task, operator):
+    task = make_task(operator=operator)
+    if operator == 'and':
+        task.having = [('brand', 'n'), ('model', 'o')]
+    session = main.BrewERSession(task)
+    expected = dict()
+    for mode in ['lazy', 'eager']:
+        expected[mode] = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                                     session.block_costs, report=False)
+        assert len(expected[mode]) > 0
+    session.close()
+
+    for depth in [1, 4]:
+        task.speculation = depth
+        task.speculation_workers = 2
+        session = main.BrewERSession(task)
+        assert isinstance(session.matcher, matching.SpeculativeMatcher)
+        for mode in ['lazy', 'eager']:
+            results = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                                  session.block_costs, report=False)
+            assert results[task.attributes].equals(expected[mode][task.attributes])
+            assert (results['comparisons'] == expected[mode]['comparisons']).all()
+        session.close()
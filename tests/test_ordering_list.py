@@ -0,0 +1,86 @@
+import math
+import ordering_list
+import pytest
+import random
+
+
+def element(record, key):
+    return {'id': [record], 'ordering_key': key}
+
+
+# Expected sequence of the identifiers of the elements: by ordering key (null values last), ties by insertion order
+def expected(model, ordering_mode):
+    def sort_key(item):
+        key, order, record = item
+        if math.isnan(key):
+            return (1, 0.0, order)
+        return (0, key if ordering_mode == 'asc' else -key, order)
+    return [record for key, order, record in sorted(model.values(), key=sort_key)]
+
+
+@pytest.mark.parametrize('ordering_mode', ['asc', 'desc'])
+def test_random_operations_match_a_sorted_list(ordering_mode):
+    rng = random.Random(42)
+    ol = ordering_list.OrderingList(ordering_mode)
+    model = dict()
+    order = 0
+    next_record = 0
+    for _ in range(0, 3000):
+        operation = rng.random()
+        if operation < 0.5 or len(model) == 0:
+            # Few distinct keys (and null ones), so that many ties are broken by the insertion order
+            key = rng.choice([1.0, 2.0, 3.0, 4.5, float('nan')])
+            ol.push(element(next_record, key))
+            model[next_record] = (key, order, next_record)
+            order = order + 1
+            next_record = next_record + 1
+        elif operation < 0.75:
+            # Removal of a group of elements (some of them already removed)
+            records = rng.sample(range(0, next_record), min(3, next_record))
+            ol.remove(records)
+            for record in records:
+                model.pop(record, None)
+        else:
+            assert ol.pop()['id'][0] == expected(model, ordering_mode)[0]
+            del model[expected(model, ordering_mode)[0]]
+        assert len(ol) == len(model)
+        if len(model) > 0:
+            assert ol.peek()['id'][0] == expected(model, ordering_mode)[0]
+    assert [item['id'][0] for item in ol.head()] == expected(model, ordering_mode)
+    assert sorted(item['id'][0] for item in ol) == sorted(model)
+
+
+def test_head_skips_removed_elements_without_modifying_the_list():
+    ol = ordering_list.OrderingList('desc')
+    for record in range(0, 20):
+        ol.push(element(record, float(record % 7)))
+    ol.remove([6, 13, 5])
+    head = [item['id'][0] for item in ol.head()]
+    assert head == [12, 19, 4, 11, 18, 3, 10, 17, 2, 9, 16, 1, 8, 15, 0, 7, 14]
+    # The iteration does not change the list
+    assert [item['id'][0] for item in ol.head()] == head
+    assert len(ol) == 17
+    assert [ol.pop()['id'][0] for _ in range(0, 17)] == head
+
+
+def test_explicit_orders_break_ties_as_if_inserted_in_that_order():
+    ol = ordering_list.OrderingList('asc')
+    # Reserve the orders of 6 elements to be inserted later (e.g., the records of a placeholder)
+    ol.reserve(6)
+    ol.push(element(100, 1.0))
+    for record, order in [(5, 5), (3, 3), (0, 0), (4, 4), (1, 1), (2, 2)]:
+        ol.push(element(record, 1.0), order)
+    ol.push(element(101, 1.0))
+    ol.push(element(102, 0.5))
+    assert [ol.pop()['id'][0] for _ in range(0, len(ol))] == [102, 0, 1, 2, 3, 4, 5, 100, 101]
+
+
+def test_contains_follows_insertions_and_removals():
+    ol = ordering_list.OrderingList('asc')
+    ol.push(element(1, 2.0))
+    ol.push(element(2, 1.0))
+    ol.remove([1])
+    assert 1 not in ol
+    assert 2 in ol
+    assert ol.pop()['id'] == [2]
+    assert len(ol) == 0
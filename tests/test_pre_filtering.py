@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pre_filtering
+import pytest
+import random
+import record_store
+import trigram_index
+
+CONDITIONS = [([('brand', 'n'), ('model', 'o')], 'and'), ([('brand', 'n'), ('model', 'o')], 'or'),
+              ([('brand', 'nikon'), ('model', 'd8')], 'and'), ([('brand', 'zz'), ('model', 'eos')], 'or'),
+              ([('brand', 'zz'), ('model', 'eos')], 'and'), ([('model', 'd.0'), ('brand', 'a|y')], 'and')]
+
+
+def make_store(seed, size=400):
+    rng = random.Random(seed)
+    brands = ['nikon', 'canon', 'sony', 'olympus', 'NaN']
+    models = ['d800', 'd500', 'coolpix', 'eos', 'alpha', 'stylus', 'NaN']
+    return record_store.RecordStore(pd.DataFrame({'id': ['r' + str(i) for i in range(0, size)],
+                                                  'brand': [rng.choice(brands) for _ in range(0, size)],
+                                                  'model': [rng.choice(models) for _ in range(0, size)]}))
+
+
+# Blocks of random records (also overlapping, of a single record or empty), in random order
+def random_blocks(seed, size=400):
+    rng = random.Random(seed)
+    blocks = [rng.sample(range(0, size), rng.choice([1, 1, 2, 3, 5, 8, 20])) for _ in range(0, 150)]
+    return blocks + [[]]
+
+
+@pytest.mark.parametrize('having, operator', CONDITIONS)
+@pytest.mark.parametrize('evaluation', ['scan', 'index', 'workload'])
+def test_seed_records_match_the_filtering_of_each_block(make_task, having, operator, evaluation):
+    task = make_task(operator=operator)
+    task.having = having
+    store = make_store(0)
+    if evaluation == 'index':
+        for attribute in ['brand', 'model']:
+            store.indices[attribute] = trigram_index.build(store.categories[attribute])
+    elif evaluation == 'workload':
+        pre_filtering.prepare_workload(store, [task])
+
+    blocks = random_blocks(1)
+    records, offsets, seeds = pre_filtering.seed_records(task, store, blocks)
+    assert offsets.tolist() == np.cumsum([0] + [len(block) for block in blocks]).tolist()
+    for index, block in enumerate(blocks):
+        start, end = offsets[index], offsets[index + 1]
+        # The records of each block are sorted as in the dataset
+        assert records[start:end].tolist() == sorted(block)
+        block_records = store.ds.iloc[sorted(block)]
+        kept = task.brewer_pre_filtering(block_records, len(block) == 1)
+        assert seeds[start:end].tolist() == block_records.index.isin(kept.index).tolist()
+
+    surviving = pre_filtering.surviving_blocks(seeds, offsets)
+    assert surviving.tolist() == [index for index in range(0, len(blocks))
+                                  if seeds[offsets[index]:offsets[index + 1]].any()]
+
+
+def test_block_extremes_ignore_null_values():
+    keys = np.array([3.0, np.nan, 1.0, np.nan, np.nan, 7.0])
+    offsets = [0, 3, 3, 5, 6]
+    assert np.allclose(pre_filtering.block_extremes(keys, offsets, 'asc'), [1.0, np.nan, np.nan, 7.0], equal_nan=True)
+    assert np.allclose(pre_filtering.block_extremes(keys, offsets, 'desc'), [3.0, np.nan, np.nan, 7.0], equal_nan=True)
@@ -0,0 +1,45 @@
+import main
+import numpy as np
+import ol_construction
+import pandas as pd
+import pytest
+
+
+def test_placeholder_bounds_the_keys_of_its_block():
+    keys = np.array([4.0, np.nan, 2.5, 9.0, np.nan, np.nan])
+    element = ol_construction.placeholder(keys, 0, 4, 7, 'asc')
+    assert element['id'] == [-8]
+    assert element['ordering_key'] == 2.5
+    assert element['placeholder'] == (0, 4)
+    assert not element['solved']
+    assert ol_construction.placeholder(keys, 0, 4, 7, 'desc')['ordering_key'] == 9.0
+    # A block whose records have only null keys
+    assert np.isnan(ol_construction.placeholder(keys, 4, 6, 0, 'asc')['ordering_key'])
+
+
+@pytest.mark.parametrize('ordering_mode', ['asc', 'desc'])
+@pytest.mark.parametrize('mode', ['lazy', 'eager'])
+def test_top_k_gives_the_first_entities_of_the_whole_query(dataset, make_task, mode, ordering_mode):
+    # Coarse ordering keys, so that many entities (and records of different blocks) are tied
+    ds = pd.read_csv('data/alaska_camera_no_nan_dataset.csv')
+    ds['megapixels'] = (ds['megapixels'] // 10) * 10
+    ds.to_csv('data/alaska_camera_no_nan_dataset.csv', index=False)
+
+    task = make_task()
+    task.ordering_mode = ordering_mode
+    session = main.BrewERSession(task)
+    expected = main.brewer(mode, task, session.store, session.matcher, session.blocks, session.record_blocks,
+                           session.block_costs, report=False)
+    assert len(expected) > 5
+    assert expected[task.ordering_key].duplicated().any()
+
+    for k in [1, 2, 5, len(expected)]:
+        task.top_k = k
+        results, query_state = main.brewer_state(mode, task, session.store, session.matcher, session.blocks,
+                                                 session.record_blocks, session.block_costs, report=False)
+        assert results[task.attributes].equals(expected[task.attributes].iloc[:k])
+        assert (results['comparisons'] <= expected['comparisons'].iloc[:k].values).all()
+        if k == 1 and ordering_mode == 'asc':
+            # The blocks which cannot contribute to the first entity (minimum of the ordering key) are never expanded
+            assert query_state.remaining()['unexpanded_blocks'] > 0
+    session.close()
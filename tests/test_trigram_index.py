@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import random
+import trigram_index
+
+
+def random_values(rng, size):
+    values = set()
+    while len(values) < size:
+        values.add(''.join(rng.choice('abcd ') for _ in range(0, rng.randint(0, 12))))
+    return np.asarray(sorted(values), dtype=object)
+
+
+def test_search_matches_str_contains():
+    rng = random.Random(3)
+    values = random_values(rng, 300)
+    index = trigram_index.build(values)
+    for _ in range(0, 200):
+        substring = ''.join(rng.choice('abcd ') for _ in range(0, rng.randint(3, 6)))
+        codes = index.search(values, substring)
+        expected = np.flatnonzero(pd.Series(values).str.contains(substring, regex=False).to_numpy(dtype=bool))
+        assert sorted(codes.tolist()) == expected.tolist()
+
+
+def test_unsearchable_substrings():
+    values = np.asarray(['canon eos', 'nikon d800'], dtype=object)
+    index = trigram_index.build(values)
+    # Too short, or with a special meaning in the patterns of str.contains
+    for substring in ['', 'd', 'eo', 'd8.0', 'eos|d800', 'n(i']:
+        assert not trigram_index.searchable(substring)
+        assert index.search(values, substring) is None
+    # A trigram which does not appear in any value
+    assert index.search(values, 'xyz').tolist() == []
+
+
+def test_saved_index_is_loaded_back(tmp_path):
+    rng = random.Random(5)
+    values = random_values(rng, 100)
+    path = str(tmp_path)
+    assert not trigram_index.exists(path, 'trigrams0')
+    trigram_index.save(trigram_index.build(values), path, 'trigrams0')
+    assert trigram_index.exists(path, 'trigrams0')
+    index = trigram_index.load(path, 'trigrams0')
+    for substring in ['abc', 'a b', 'dd ', 'cab']:
+        expected = [code for code, value in enumerate(values) if substring in value]
+        assert sorted(index.search(values, substring).tolist()) == expected
@@ -0,0 +1,39 @@
+import networkx as nx
+import numpy as np
+import pytest
+import union_find
+
+
+@pytest.mark.parametrize('seed', range(0, 10))
+def test_clusters_match_connected_components(seed):
+    rng = np.random.default_rng(seed)
+    size = 300
+    edges = rng.integers(0, size, size=(int(rng.integers(0, 400)), 2))
+    sets = union_find.UnionFind(size)
+    sets.union_pairs(edges[:, 0], edges[:, 1])
+
+    graph = nx.Graph()
+    graph.add_nodes_from(range(0, size))
+    graph.add_edges_from(edges.tolist())
+    components = [sorted(component) for component in nx.connected_components(graph) if len(component) > 1]
+
+    clusters = sets.clusters()
+    # Each cluster is sorted as in the dataset
+    assert all(cluster.tolist() == sorted(cluster.tolist()) for cluster in clusters)
+    assert sorted(cluster.tolist() for cluster in clusters) == sorted(components)
+
+    # The records of the same component (and only them) share the label and the representative
+    labels = sets.labels()
+    for component in nx.connected_components(graph):
+        component = list(component)
+        assert len(set(labels[component].tolist())) == 1
+        assert len(set(sets.find(record) for record in component)) == 1
+    assert len(set(labels.tolist())) == nx.number_connected_components(graph)
+
+
+def test_no_clusters_without_pairs():
+    sets = union_find.UnionFind(5)
+    assert sets.clusters() == list()
+    assert sets.labels().tolist() == [0, 1, 2, 3, 4]
+    sets.union(3, 3)
+    assert sets.clusters() == list()
@@ -0,0 +1,76 @@
+import block_index
+import numpy as np
+import os
+
+# Characters with a special meaning in the patterns of str.contains (the index supports only literal substrings)
+SPECIAL_CHARACTERS = set('.^$*+?{}[]\\|()')
+
+
+def trigrams(value):
+    return set(value[i:i + 3] for i in range(0, len(value) - 2))
+
+
+# Check if the index can be used to find the values containing the substring
+def searchable(substring):
+    return len(substring) >= 3 and not any(character in SPECIAL_CHARACTERS for character in substring)
+
+
+class TrigramIndex(object):
+    # Inverted index of the trigrams of the distinct values of a textual attribute (referred by their codes in the
+    # record store): the values containing a substring are found by intersecting the posting lists of its trigrams and
+    # then verifying the candidates, instead of scanning all the values
+    # The trigrams are kept sorted, each one with its posting list (sorted codes of the values containing it)
+    def __init__(self, keys, postings):
+        self.keys = keys
+        self.postings = postings
+
+    # Get the codes of the values containing the substring (None if the index cannot be used for the substring)
+    def search(self, values, substring):
+        if not searchable(substring):
+            return None
+        # Intersect the posting lists of the trigrams, starting from the shortest ones
+        lists = list()
+        for key in trigrams(substring):
+            position = np.searchsorted(self.keys, key)
+            if position == len(self.keys) or self.keys[position] != key:
+                return np.empty(0, dtype=np.int64)
+            lists.append(self.postings[position])
+        candidates = None
+        for posting in sorted(lists, key=len):
+            if candidates is None:
+                candidates = np.asarray(posting)
+            else:
+                candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        # Verify the candidates (the trigrams of the substring may appear in a value in a different order)
+        return np.array([code for code in candidates.tolist() if substring in values[code]], dtype=np.int64)
+
+
+# Build the trigram index of the distinct values of an attribute
+def build(values):
+    postings = dict()
+    for code, value in enumerate(values):
+        for key in trigrams(value):
+            postings.setdefault(key, list()).append(code)
+    keys = sorted(postings.keys())
+    return TrigramIndex(np.array(keys, dtype='U3'),
+                        block_index.Rows(np.cumsum([0] + [len(postings[key]) for key in keys], dtype=np.int64),
+                                         np.array([code for key in keys for code in postings[key]], dtype=np.int32)))
+
+
+# Write the files of the index (the trigrams last: an interrupted write leaves no index)
+def save(index, path, name):
+    np.save(block_index.file(path, name + '_offsets'), np.asarray(index.postings.offsets))
+    np.save(block_index.file(path, name + '_codes'), np.asarray(index.postings.values))
+    np.save(block_index.file(path, name + '_keys'), index.keys)
+
+
+def load(path, name):
+    return TrigramIndex(np.load(block_index.file(path, name + '_keys'), mmap_mode='r'),
+                        block_index.Rows(np.load(block_index.file(path, name + '_offsets'), mmap_mode='r'),
+                                         np.load(block_index.file(path, name + '_codes'), mmap_mode='r')))
+
+
+def exists(path, name):
+    return all(os.path.isfile(block_index.file(path, name + suffix)) for suffix in ['_offsets', '_codes', '_keys'])
@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class UnionFind(object):
+    # Disjoint sets of records (integer identifiers), kept in NumPy arrays: each record points to its parent, up to the
+    # representative of its set, with path compression on find and union by rank
+    def __init__(self, size):
+        self.parent = np.arange(size, dtype=np.int64)
+        self.rank = np.zeros(size, dtype=np.int8)
+
+    def find(self, record):
+        root = record
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression: the records on the path point directly to the representative
+        while self.parent[record] != root:
+            self.parent[record], record = root, self.parent[record]
+        return root
+
+    def union(self, left, right):
+        left = self.find(left)
+        right = self.find(right)
+        if left == right:
+            return
+        # Union by rank: the shallower tree is attached to the deeper one
+        if self.rank[left] < self.rank[right]:
+            left, right = right, left
+        self.parent[right] = left
+        if self.rank[left] == self.rank[right]:
+            self.rank[left] = self.rank[left] + 1
+
+    # Merge the sets of the given pairs of records (arrays of integer identifiers)
+    def union_pairs(self, left, right):
+        for i, j in zip(left.tolist(), right.tolist()):
+            self.union(i, j)
+
+    # Get the label (representative) of the set of each record, compressing all the paths at once
+    def labels(self):
+        while True:
+            grandparent = self.parent[self.parent]
+            if np.array_equal(grandparent, self.parent):
+                return self.parent
+            self.parent = grandparent
+
+    # Get the sets containing more than one record, as arrays of integer identifiers sorted as in the dataset
+    def clusters(self):
+        labels = self.labels()
+        sizes = np.bincount(labels, minlength=len(labels))
+        records = np.flatnonzero(sizes[labels] > 1)
+        if len(records) == 0:
+            return list()
+        records = records[np.argsort(labels[records], kind='stable')]
+        starts = np.flatnonzero(np.r_[True, labels[records][1:] != labels[records][:-1]])
+        return np.split(records, starts[1:])